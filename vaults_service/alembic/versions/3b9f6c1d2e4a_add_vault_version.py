@@ -0,0 +1,28 @@
+"""Add vault version
+
+Revision ID: 3b9f6c1d2e4a
+Revises: 8d4e2a6f1b7c
+Create Date: 2026-10-19 13:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9f6c1d2e4a'
+down_revision: Union[str, None] = '8d4e2a6f1b7c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('vaults', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('vaults', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('vaults', 'updated_at')
+    op.drop_column('vaults', 'version')
@@ -0,0 +1,41 @@
+"""Add document preview
+
+Revision ID: 8d4e2a6f1b7c
+Revises: 5c1f7e2d9b3a
+Create Date: 2026-10-19 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e2a6f1b7c'
+down_revision: Union[str, None] = '5c1f7e2d9b3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('preview', sa.Text(), nullable=True))
+    # Same cut as make_preview: up to the first whitespace after 200 characters,
+    # or at 200 characters when no whitespace follows
+    op.execute(
+        """
+        UPDATE documents
+        SET preview = CASE
+            WHEN length(coalesce(text, '')) > 200
+                THEN coalesce(
+                    substring(text from '^.{200}\\S*(?=\\s)'), left(text, 200)
+                ) || '...'
+            ELSE coalesce(text, '')
+        END
+        """
+    )
+    op.alter_column('documents', 'preview', nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'preview')
@@ -0,0 +1,11 @@
+import os
+
+import pytest
+
+from src.vaults.utils import encrypt_data
+
+
+@pytest.mark.parametrize("size", [64 * 1024, 8 * 1024 * 1024], ids=["64KiB", "8MiB"])
+def bench_encrypt_data(benchmark, run, size):
+    data = os.urandom(size)
+    benchmark(lambda: run(encrypt_data(data, password="benchmark")))
@@ -0,0 +1,46 @@
+from io import BytesIO
+
+import pytest
+
+from benchmarks.texts import make_text
+from benchmarks.conftest import DOCX, PDF, make_upload
+from src.utils.readers import process_text, read_docx, read_pdf
+
+
+def bench_read_pdf(benchmark, run, pdf_bytes):
+    benchmark(lambda: run(read_pdf(make_upload(pdf_bytes, PDF))))
+
+
+async def legacy_read_docx(file) -> str:
+    # The python-docx reader read_docx replaced, building the whole object tree
+    from docx import Document
+
+    document = Document(BytesIO(await file.read()))
+    texts = []
+
+    for element in document.element.body:
+        if element.tag.endswith("p"):
+            texts.append(element.text)
+        elif element.tag.endswith("tbl"):
+            for row in element:
+                for cell in row:
+                    if cell.text:
+                        texts.append(cell.text)
+
+    return await process_text("\n".join(texts))
+
+
+@pytest.mark.parametrize(
+    "reader",
+    [
+        pytest.param(legacy_read_docx, id="python-docx"),
+        pytest.param(read_docx, id="iterparse"),
+    ],
+)
+def bench_read_docx(benchmark, run, docx_bytes, reader):
+    benchmark(lambda: run(reader(make_upload(docx_bytes, DOCX))))
+
+
+def bench_process_text(benchmark, run):
+    text = make_text(100_000)  # ~6 MB
+    benchmark(lambda: run(process_text(text)))
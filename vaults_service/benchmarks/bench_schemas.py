@@ -0,0 +1,60 @@
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic_core import to_json
+
+from benchmarks.texts import make_text
+from src.utils.readers import make_preview
+from src.vaults.schemas import CreateRequestToKBService, DocumentResponse, DocumentText
+
+
+def make_documents(count: int) -> list:
+    text = make_text(200)
+    vault_id = uuid.uuid4()
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            name=f"document-{i}.pdf",
+            preview=make_preview(text),
+            vault_id=vault_id,
+        )
+        for i in range(count)
+    ]
+
+
+def bench_document_response_validation(benchmark):
+    documents = make_documents(2000)
+    benchmark(
+        lambda: [DocumentResponse.model_validate(document) for document in documents]
+    )
+
+
+def make_create_request(count: int) -> CreateRequestToKBService:
+    text = make_text(20_000)  # About 1 MB per document
+    return CreateRequestToKBService(
+        vault_id=uuid.uuid4(),
+        documents=[
+            DocumentText(document_id=uuid.uuid4(), document_name=f"{i}.pdf", text=text)
+            for i in range(count)
+        ],
+    )
+
+
+def legacy_serialize(body: CreateRequestToKBService) -> bytes:
+    # The dict built by jsonable_encoder, dumped by aiohttp with the json module
+    return json.dumps(jsonable_encoder(body)).encode()
+
+
+@pytest.mark.parametrize(
+    "serialize",
+    [
+        pytest.param(legacy_serialize, id="jsonable_encoder"),
+        pytest.param(to_json, id="pydantic"),
+    ],
+)
+def bench_kb_payload_serialization(benchmark, serialize):
+    body = make_create_request(8)
+    benchmark(serialize, body)
@@ -0,0 +1,65 @@
+"""Micro-benchmark for text normalization and preview generation.
+
+Run from vaults_service: python -m benchmarks.bench_text
+"""
+import re
+import timeit
+
+from benchmarks.env import set_default_env
+from benchmarks.texts import make_text
+
+set_default_env()
+
+from src.utils.readers import (  # noqa: E402
+    TextNormalizer,
+    make_preview,
+    normalize_text,
+)
+
+
+def legacy_process_text(text: str) -> str:
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    return text.replace("-\n", "")
+
+
+def legacy_preview(text: str) -> str:
+    if len(text) > 200:
+        if match := re.search(r"\s", text[200:]):
+            return text[: (match.start() + 200)] + "..."
+        return text[:200] + "..."
+    return text
+
+
+def streaming_normalize(text: str, chunk_size: int = 64 * 1024) -> str:
+    normalizer = TextNormalizer()
+    chunks = [
+        normalizer.feed(text[i : i + chunk_size])
+        for i in range(0, len(text), chunk_size)
+    ]
+    chunks.append(normalizer.close())
+    return "".join(chunks)
+
+
+def measure(name: str, func, text: str, repeat: int = 5) -> None:
+    seconds = min(timeit.repeat(lambda: func(text), number=1, repeat=repeat))
+    megabytes = len(text.encode()) / 1024 / 1024
+    print(f"{name:<28} {seconds * 1000:8.2f} ms  {megabytes / seconds:8.1f} MB/s")
+
+
+def main() -> None:
+    for lines in (10_000, 100_000):
+        text = make_text(lines)
+        assert normalize_text(text) == legacy_process_text(text)
+        assert streaming_normalize(text) == legacy_process_text(text)
+        assert make_preview(text) == legacy_preview(text)
+
+        print(f"--- {len(text.encode()) / 1024 / 1024:.1f} MB of text ---")
+        measure("legacy process_text", legacy_process_text, text)
+        measure("normalize_text", normalize_text, text)
+        measure("TextNormalizer (64 KiB)", streaming_normalize, text)
+        measure("legacy preview", legacy_preview, text)
+        measure("make_preview", make_preview, text)
+
+
+if __name__ == "__main__":
+    main()
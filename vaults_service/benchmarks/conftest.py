@@ -0,0 +1,73 @@
+"""Shared fixtures for the micro-benchmarks.
+
+Run from vaults_service: pytest -c benchmarks/pytest.ini benchmarks
+"""
+import asyncio
+from io import BytesIO
+
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from benchmarks.env import set_default_env
+from benchmarks.texts import make_text
+
+set_default_env()
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def make_upload(content: bytes, content_type: str) -> UploadFile:
+    return UploadFile(
+        BytesIO(content),
+        size=len(content),
+        filename="benchmark",
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine to completion on one event loop shared by all rounds."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(scope="session", params=[10, 200], ids=lambda pages: f"{pages}p")
+def pdf_bytes(request) -> bytes:
+    import fitz
+
+    document = fitz.open()
+    text = make_text(40)
+    for _ in range(request.param):
+        page = document.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=8)
+    return document.tobytes()
+
+
+@pytest.fixture(scope="session", params=[100, 5000, 50_000], ids=lambda n: f"{n}par")
+def docx_bytes(request) -> bytes:
+    from docx import Document
+    from docx.oxml import OxmlElement
+
+    document = Document()
+    # add_paragraph looks for the section properties each time, too slow for 50k
+    section_properties = document.element.body[-1]
+    for line in make_text(request.param).split("\n"):
+        text = OxmlElement("w:t")
+        text.text = line
+        run = OxmlElement("w:r")
+        run.append(text)
+        paragraph = OxmlElement("w:p")
+        paragraph.append(run)
+        section_properties.addprevious(paragraph)
+
+    table = document.add_table(rows=20, cols=4)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.text = "cell text"
+
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
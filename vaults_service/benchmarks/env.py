@@ -0,0 +1,22 @@
+import os
+
+# Settings are read at import time, benchmarks do not talk to real services
+DEFAULT_ENV = {
+    "DB_DIALECT": "postgresql",
+    "DB_ASYNC_DRIVER": "asyncpg",
+    "DB_HOST": "localhost",
+    "DB_NAME": "vaults",
+    "DB_USER": "vaults",
+    "DB_PASSWORD": "vaults",
+    "S3_ACCESS_KEY": "minioadmin",
+    "S3_SECRET_KEY": "minioadmin",
+    "S3_ENDPOINT_URL": "http://localhost:9000",
+    "S3_BUCKET_NAME": "vaults",
+    "ENCRYPTION_PASSWORD": "benchmark",
+}
+
+
+def set_default_env() -> None:
+    """Fill in the service settings left unset, call before importing `src`."""
+    for name, value in DEFAULT_ENV.items():
+        os.environ.setdefault(name, value)
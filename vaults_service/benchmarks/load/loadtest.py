@@ -0,0 +1,176 @@
+"""Async load harness for the vaults service routes.
+
+Start the stack with `docker compose -f benchmarks/load/docker-compose.yaml up`,
+then run from vaults_service:
+
+    python -m benchmarks.load.loadtest --scenario mixed --concurrency 32 --duration 60
+
+Reports requests, errors, throughput and p50/p99 latency per route.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import aiohttp
+
+from benchmarks.texts import make_text
+
+SCENARIOS = {
+    "create_vault": {"create_vault": 1},
+    "add_document": {"add_document": 1},
+    "read": {"get_vault_by_id": 1, "get_vault_documents": 1, "get_users_vaults": 1},
+    "mixed": {
+        "create_vault": 1,
+        "add_document": 4,
+        "get_vault_by_id": 5,
+        "get_vault_documents": 5,
+        "get_users_vaults": 5,
+    },
+}
+
+
+@dataclass
+class Stats:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+class Client:
+    def __init__(self, session: aiohttp.ClientSession, args: argparse.Namespace):
+        self.session = session
+        self.base_url = args.base_url.rstrip("/")
+        self.user_id = str(uuid.uuid4())
+        self.files = args.files
+        self.file = make_text(args.file_lines).encode()
+
+    def files_form(self, field_name: str, count: int) -> aiohttp.FormData:
+        form = aiohttp.FormData()
+        for i in range(count):
+            form.add_field(
+                field_name, self.file, filename=f"doc-{i}.txt", content_type="text/plain"
+            )
+        return form
+
+    async def create_vault(self) -> dict:
+        form = self.files_form("files", self.files)
+        form.add_field(
+            "create_vault_request",
+            json.dumps(
+                {
+                    "user_id": self.user_id,
+                    "vault_name": "load test",
+                    "vault_type": random.choice(["graph", "vector"]),
+                }
+            ),
+        )
+        return await self.request("POST", "/create_vault?only_changes=true", data=form)
+
+    async def add_document(self, vault_id: str) -> dict:
+        form = self.files_form("file", 1)
+        form.add_field("vault_id", vault_id)
+        return await self.request("POST", "/add_document?only_changes=true", data=form)
+
+    async def get_vault_by_id(self, vault_id: str) -> dict:
+        return await self.request("POST", "/get_vault_by_id", json={"vault_id": vault_id})
+
+    async def get_vault_documents(self, vault_id: str) -> dict:
+        return await self.request(
+            "POST", "/get_vault_documents", json={"vault_id": vault_id}
+        )
+
+    async def get_users_vaults(self, vault_id: str) -> dict:
+        return await self.request(
+            "POST", "/get_users_vaults", json={"user_id": self.user_id}
+        )
+
+    async def request(self, method: str, path: str, **kwargs) -> dict:
+        async with self.session.request(method, self.base_url + path, **kwargs) as response:
+            response.raise_for_status()
+            return await response.json()
+
+
+async def worker(
+    client: Client, vault_id: str, operations: List[str], deadline: float, stats: Stats
+) -> None:
+    while time.perf_counter() < deadline:
+        operation = random.choice(operations)
+        start = time.perf_counter()
+        try:
+            if operation == "create_vault":
+                await client.create_vault()
+            else:
+                await getattr(client, operation)(vault_id)
+        except Exception:
+            stats.errors[operation] += 1
+        else:
+            stats.latencies[operation].append(time.perf_counter() - start)
+
+
+def percentile(values: List[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def report(stats: Stats, duration: float) -> None:
+    print(
+        f"{'route':<22}{'requests':>10}{'errors':>8}{'req/s':>10}"
+        f"{'p50 ms':>10}{'p99 ms':>10}"
+    )
+    for operation in sorted(set(stats.latencies) | set(stats.errors)):
+        latencies = stats.latencies[operation]
+        print(
+            f"{operation:<22}{len(latencies):>10}{stats.errors[operation]:>8}"
+            f"{len(latencies) / duration:>10.1f}"
+            f"{percentile(latencies, 50) * 1000:>10.1f}"
+            f"{percentile(latencies, 99) * 1000:>10.1f}"
+        )
+
+
+async def run(args: argparse.Namespace) -> None:
+    operations = [
+        operation
+        for operation, weight in SCENARIOS[args.scenario].items()
+        for _ in range(weight)
+    ]
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        client = Client(session, args)
+        vault_id = (await client.create_vault())["id"]  # Shared by read/add routes
+
+        stats = Stats()
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[
+                worker(client, vault_id, operations, start + args.duration, stats)
+                for _ in range(args.concurrency)
+            ]
+        )
+        report(stats, time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8200")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument("--files", type=int, default=5, help="Files per created vault")
+    parser.add_argument(
+        "--file-lines", type=int, default=2000, help="Lines of text per file"
+    )
+    parser.add_argument("--timeout", type=float, default=120, help="Per request")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Stand-in for the graph/vector knowledge base services.
+
+Accepts the same requests as the real services, keeps document ids in memory and
+answers after a configurable delay, so load tests measure the vaults service
+rather than the knowledge bases.
+
+Usage: python -m benchmarks.load.stub_kb --port 8000 --latency-ms 50
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+
+from aiohttp import web
+
+routes = web.RouteTableDef()
+
+
+@routes.get("/")
+async def root(request: web.Request) -> web.Response:
+    return web.json_response({"message": "Hello from stub_kb"})
+
+
+@routes.post("/create")
+async def create(request: web.Request) -> web.Response:
+    body = await request.json()
+    await asyncio.sleep(request.app["latency"] * max(len(body["documents"]), 1))
+    request.app["vaults"][body["vault_id"]] = {
+        document["document_id"] for document in body["documents"]
+    }
+    return web.json_response({"status": "created"})
+
+
+@routes.post("/add_document")
+async def add_document(request: web.Request) -> web.Response:
+    body = await request.json()
+    await asyncio.sleep(request.app["latency"])
+    request.app["vaults"][body["vault_id"]].add(body["document"]["document_id"])
+    return web.json_response({"status": "added"})
+
+
+@routes.delete("/drop")
+async def drop(request: web.Request) -> web.Response:
+    body = await request.json()
+    request.app["vaults"].pop(body["vault_id"], None)
+    return web.json_response({"status": "dropped"})
+
+
+@routes.delete("/delete_document")
+async def delete_document(request: web.Request) -> web.Response:
+    body = await request.json()
+    request.app["vaults"][body["vault_id"]].discard(body["document_id"])
+    return web.json_response({"status": "deleted"})
+
+
+@routes.post("/list_documents")
+async def list_documents(request: web.Request) -> web.Response:
+    body = await request.json()
+    document_ids = sorted(request.app["vaults"].get(body["vault_id"], ()))
+    if body.get("after"):
+        document_ids = [id for id in document_ids if id > body["after"]]
+    return web.json_response({"document_ids": document_ids[: body["limit"]]})
+
+
+def make_app(latency_ms: float) -> web.Application:
+    app = web.Application(client_max_size=1024**3)
+    app["latency"] = latency_ms / 1000
+    app["vaults"] = defaultdict(set)
+    app.add_routes(routes)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0, help="Delay per indexed document"
+    )
+    args = parser.parse_args()
+
+    web.run_app(make_app(args.latency_ms), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""Synthetic texts shared by the benchmarks and the load harness.
+
+Kept free of `src` imports, the load harness runs without the service settings.
+"""
+import random
+
+WORDS = ["lorem", "ipsum", "dolor-", "sit", "amet,", "consec-", "tetur"]
+LINE_ENDINGS = ["", " ", "  ", "\t"]
+
+
+def make_text(lines: int) -> str:
+    rng = random.Random(0)
+    return "\n".join(
+        " ".join(rng.choice(WORDS) for _ in range(10)) + rng.choice(LINE_ENDINGS)
+        for _ in range(lines)
+    )
@@ -0,0 +1,36 @@
+# Production server: gunicorn managing uvicorn worker processes.
+#   gunicorn main:app -c gunicorn.conf.py
+import os
+import shutil
+import sys
+
+# Make the src package importable, gunicorn only puts its own script dir on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Prometheus metrics are shared between workers through files in this directory,
+# it has to be set before prometheus_client is imported
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/vaults_service_metrics")
+
+from prometheus_client import multiprocess  # noqa: E402
+
+from src.config import settings  # noqa: E402
+
+bind = "0.0.0.0:8000"
+workers = settings.web_concurrency
+worker_class = "src.workers.VaultsUvicornWorker"
+logconfig = "uvicorn_logging.conf"
+
+# Workers get this long after SIGTERM to finish in-flight requests and ingestion
+graceful_timeout = settings.graceful_shutdown_timeout
+timeout = 120
+keepalive = 5
+
+
+def on_starting(server):
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
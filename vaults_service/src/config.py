@@ -1,6 +1,9 @@
 import logging
+import os
 from pathlib import Path
 
+from Crypto.Cipher import AES
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
 logging.basicConfig(
@@ -19,17 +22,101 @@ class Settings(BaseSettings):
     db_user: str
     db_password: str
 
+    # Pool limits are per server worker process
+    db_pool_size: int = 12
+    db_max_overflow: int = 4
+    db_max_connections: int | None = None  # Split across workers, overrides the above
+
+    web_concurrency: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    graceful_shutdown_timeout: int = 120  # Seconds to drain in-flight ingestion
+    warm_up_parsers: bool = False  # Import PDF/DOCX parsers at startup, not on first use
+
     graph_service_url: str = "http://papper-graph-kb-service:8000"
     vector_service_url: str = "http://papper-vector-kb-service:8000"
+    kb_health_path: str = "/"
+    # Total seconds per KB endpoint, creates carry whole vaults
+    kb_timeouts: dict[str, float] = {
+        "create": 600,
+        "add_document": 120,
+        "drop": 60,
+        "delete_document": 30,
+        "list_documents": 30,
+    }
+    kb_default_timeout: float = 60
+    kb_connect_timeout: float = 5
+    kb_max_concurrency: int = 32  # Requests in flight per service and worker
+    kb_queue_timeout: float = 10  # Seconds to wait for a free slot
+    kb_breaker_failure_threshold: int = 5
+    kb_breaker_reset_timeout: float = 30
     
     s3_access_key: str
     s3_secret_key: str
     s3_endpoint_url: str
     s3_bucket_name: str
     verify: bool = False
+    s3_max_pool_connections: int = 32
     
     encryption_password: str
+
+    bulk_ingest_concurrency: int = 4
+    clone_copy_concurrency: int = 16  # S3 copies in flight per clone
+    reconcile_batch_size: int = 500  # Ids listed and documents re-sent per batch
+    reconcile_concurrency: int = 4
+    reconcile_grace_period: int = 600  # Seconds a pending document is left to its request
+    vault_creation_stale_after: int = 600  # Seconds before a stuck KB sync can be retried
+    kb_deletion_max_attempts: int = 10  # Failed KB deletions are parked after these
+    upload_chunk_size: int = 8 * 1024 * 1024  # Multiple of the AES block size, >= 5 MiB for S3
+
+    pdf_parallel_page_threshold: int = 64  # Smaller PDFs are parsed in a single process
+    pdf_extraction_workers: int | None = None  # Defaults to CPUs per server worker
+
+    tracing_exporter: str = "none"  # "none", "otlp" or "file"
+    tracing_service_name: str = "papper-vaults-service"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_file_path: str = "traces.jsonl"
+
+    # Token buckets per user, for ingestion requests and for uploaded bytes
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # "memory" (per worker) or "redis" (shared)
+    rate_limit_redis_url: str = "redis://localhost:6379/0"
+    rate_limit_requests_per_second: float = 1.0
+    rate_limit_request_burst: int = 30
+    rate_limit_bytes_per_second: float = 5 * 1024 * 1024
+    rate_limit_byte_burst: int = 256 * 1024 * 1024
+
+    health_check_ttl: float = 5.0  # Seconds a dependency check result is reused
+    health_check_timeout: float = 2.0
+    # Failing checks of these make the replica unready, the others are reported only
+    ready_dependencies: list[str] = ["postgres", "s3"]
+    ready_pool_saturation: float = 1.0  # Share of pool + overflow checked out
+    ready_max_in_flight_ingestions: int | None = None
+    ready_max_queued_documents: int | None = None
+
+    profiling_enabled: bool = False
+    profiling_header: str = "X-Profile"  # Send "X-Profile: 1" to profile a request
+    profiling_sample_rate: float = 0.0  # Share of requests profiled at random
+    profiling_threshold_ms: float | None = None  # Profiles every request, keeps slow ones
+    profiling_interval: float = 0.001
+    profiling_output_dir: str = "profiles"
     
+    @field_validator("upload_chunk_size")
+    @classmethod
+    def check_upload_chunk_size(cls, value: int) -> int:
+        # Parts are encrypted one by one, each must end on a CBC block boundary
+        if value <= 0 or value % AES.block_size:
+            raise ValueError(f"must be a positive multiple of {AES.block_size}")
+        return value
+
+    @property
+    def db_pool_limits(self) -> tuple[int, int]:
+        """Pool size and overflow for one worker process."""
+        if self.db_max_connections is None:
+            return self.db_pool_size, self.db_max_overflow
+
+        per_worker = max(self.db_max_connections // max(self.web_concurrency, 1), 1)
+        overflow = min(self.db_max_overflow, per_worker - 1)
+        return per_worker - overflow, overflow
+
     @property
     def database_url(self) -> str:
         return f"{self.db_dialect}+{self.db_async_driver}://{self.db_user}:{self.db_password}@{self.db_host}:5432/{self.db_name}"
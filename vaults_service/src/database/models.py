@@ -1,4 +1,15 @@
-from sqlalchemy import UUID, DateTime, ForeignKey, String, Text, func
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import DeclarativeBase, mapped_column, relationship
 
 
@@ -8,11 +19,22 @@ class Base(DeclarativeBase):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        Index("ix_documents_vault_id_sync_status", "vault_id", "sync_status"),
+    )
 
     id = mapped_column(UUID(as_uuid=True), primary_key=True)
     name = mapped_column(String, nullable=False, unique=False)
     text = mapped_column(Text)
+    preview = mapped_column(Text, nullable=False)
     vault_id = mapped_column(ForeignKey("vaults.id"), nullable=False)
+    # Knowledge base sync state, the version is bumped on every state change
+    sync_status = mapped_column(
+        String, nullable=False, default="pending", server_default="pending"
+    )
+    sync_version = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    sync_error = mapped_column(Text)
+    sync_updated_at = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     vaults = relationship("Vault", back_populates="documents")
 
@@ -25,5 +47,87 @@ class Vault(Base):
     type = mapped_column(String, nullable=False, unique=False)
     created_at = mapped_column(DateTime(timezone=True), server_default=func.now())
     user_id = mapped_column(UUID(as_uuid=True), nullable=False)
+    # Bumped whenever the vault or its documents change, the source of read ETags
+    version = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Kept in step with the documents by the statements writing them
+    document_count = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    total_bytes = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
 
     documents = relationship("Document", back_populates="vaults")
+
+
+class VaultCreation(Base):
+    """Progress of a vault creation, kept so a failed knowledge base sync can resume."""
+
+    __tablename__ = "vault_creations"
+
+    vault_id = mapped_column(ForeignKey("vaults.id"), primary_key=True)
+    status = mapped_column(String, nullable=False, server_default="storing")
+    kb_attempts = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_error = mapped_column(Text)
+    created_at = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    vault = relationship("Vault")
+
+
+class KnowledgeBaseDeletion(Base):
+    """A drop or document delete the knowledge base has not acknowledged yet."""
+
+    __tablename__ = "knowledge_base_deletions"
+
+    id = mapped_column(Integer, primary_key=True, autoincrement=True)
+    vault_id = mapped_column(UUID(as_uuid=True), nullable=False)
+    vault_type = mapped_column(String, nullable=False)
+    document_id = mapped_column(UUID(as_uuid=True))  # Drops the whole vault if null
+    created_at = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Failed retries, rows reaching kb_deletion_max_attempts are parked
+    attempts = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_attempt_at = mapped_column(DateTime(timezone=True))
+    last_error = mapped_column(Text)
+
+
+class Upload(Base):
+    __tablename__ = "uploads"
+
+    id = mapped_column(UUID(as_uuid=True), primary_key=True)
+    document_id = mapped_column(UUID(as_uuid=True), nullable=False)
+    vault_id = mapped_column(ForeignKey("vaults.id"), nullable=False)
+    filename = mapped_column(String, nullable=False)
+    content_type = mapped_column(String, nullable=False)
+    size = mapped_column(BigInteger, nullable=False)
+    chunk_size = mapped_column(Integer, nullable=False)
+    s3_upload_id = mapped_column(String, nullable=False)
+    salt = mapped_column(LargeBinary, nullable=False)
+    iv = mapped_column(LargeBinary, nullable=False)
+    status = mapped_column(String, nullable=False, server_default="in_progress")
+    sha256 = mapped_column(String)
+    created_at = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    parts = relationship(
+        "UploadPart",
+        back_populates="upload",
+        order_by="UploadPart.part_number",
+        cascade="all, delete-orphan",
+    )
+
+
+class UploadPart(Base):
+    __tablename__ = "upload_parts"
+
+    upload_id = mapped_column(ForeignKey("uploads.id"), primary_key=True)
+    part_number = mapped_column(Integer, primary_key=True)
+    size = mapped_column(Integer, nullable=False)
+    etag = mapped_column(String, nullable=False)
+    sha256 = mapped_column(String, nullable=False)
+    # Last ciphertext block of the part, the CBC chaining value for the next part
+    last_block = mapped_column(LargeBinary, nullable=False)
+
+    upload = relationship("Upload", back_populates="parts")
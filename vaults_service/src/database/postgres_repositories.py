@@ -1,22 +1,138 @@
+import hashlib
 import typing
 from abc import ABC, abstractmethod
+from datetime import timedelta
 from uuid import UUID
 
-from sqlalchemy import pool, select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import (
+    String,
+    cast,
+    delete,
+    event,
+    func,
+    insert,
+    literal,
+    pool,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import defer, selectinload
 
 from src.config import settings
 from src.database import models
+from src.utils.metrics import DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW, DB_POOL_SIZE
+from src.utils.tracing import traced
 
-engine = create_async_engine(
-    settings.database_url,
-    poolclass=pool.AsyncAdaptedQueuePool,
-    pool_size=12,
-    max_overflow=4,
-    pool_pre_ping=True,
-)
+engine: AsyncEngine | None = None
+
+# Bound to the engine by init_engine when the application starts
+Session = async_sessionmaker(class_=AsyncSession, expire_on_commit=False)
+
+
+def init_engine() -> AsyncEngine:
+    global engine
+
+    pool_size, max_overflow = settings.db_pool_limits
+    engine = create_async_engine(
+        settings.database_url,
+        poolclass=pool.AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True,
+    )
+    Session.configure(bind=engine)
+
+    DB_POOL_SIZE.set(pool_size)
+    event.listen(engine.sync_engine, "checkout", on_checkout)
+    event.listen(engine.sync_engine, "checkin", on_checkin)
+
+    return engine
+
+
+def set_pool_overflow(returning: int = 0) -> None:
+    # Connections beyond the pool size are closed as soon as they are returned
+    if engine is not None:
+        in_use = engine.pool.checkedout() - returning
+        DB_POOL_OVERFLOW.set(max(in_use - engine.pool.size(), 0))
+
+
+def on_checkout(*args) -> None:
+    DB_POOL_CHECKED_OUT.inc()
+    set_pool_overflow()
+
+
+def on_checkin(*args) -> None:
+    DB_POOL_CHECKED_OUT.dec()
+    # Fired before the connection is back in the pool
+    set_pool_overflow(returning=1)
+
+
+async def ping_database() -> None:
+    """Run a trivial query, also opens the first pooled connection at startup."""
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+def get_pool_status() -> dict:
+    pool_size, max_overflow = settings.db_pool_limits
+    return {
+        "size": pool_size,
+        "max_overflow": max_overflow,
+        "checked_out": engine.pool.checkedout() if engine is not None else 0,
+    }
 
-Session = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+async def dispose_engine() -> None:
+    global engine
+
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+
+
+def clone_document_id(document_id: UUID, vault_id: UUID) -> UUID:
+    """Id of the copy of a document in another vault, as computed by clone()."""
+    return UUID(hashlib.md5(f"{document_id}{vault_id}".encode()).hexdigest())
+
+
+def get_text_size(document: models.Document) -> int:
+    return len(document.text.encode()) if document.text else 0
+
+
+def bump_vault_version(vault_id: UUID, documents: int = 0, text_bytes: int = 0):
+    """Mark the vault changed, adding `documents` and `text_bytes` to its totals."""
+    return (
+        update(models.Vault)
+        .where(models.Vault.id == vault_id)
+        .values(
+            version=models.Vault.version + 1,
+            updated_at=func.now(),
+            document_count=models.Vault.document_count + documents,
+            total_bytes=models.Vault.total_bytes + text_bytes,
+        )
+    )
+
+
+def count_vault_statistics(vault_id: UUID):
+    """Recount the vault's totals from its documents."""
+    documents = select(models.Document).where(models.Document.vault_id == vault_id)
+    text_bytes = func.coalesce(func.sum(func.octet_length(models.Document.text)), 0)
+    return (
+        update(models.Vault)
+        .where(models.Vault.id == vault_id)
+        .values(
+            document_count=documents.with_only_columns(func.count()).scalar_subquery(),
+            total_bytes=documents.with_only_columns(text_bytes).scalar_subquery(),
+        )
+    )
 
 
 class AbstractRepository(ABC):
@@ -33,39 +149,105 @@ class DocumentRepository(AbstractRepository):
     def __init__(self):
         self.session = Session()
 
+    @traced
     async def add(self, entity) -> None:
         async with self.session as session:
             async with session.begin():
                 session.add(entity)
+                await session.execute(
+                    bump_vault_version(entity.vault_id, 1, get_text_size(entity))
+                )
 
+    @traced
     async def get(self, id: UUID) -> models.Document | None:
         async with self.session as session:
             document = await session.get(models.Document, id)
             return document
 
+    @traced
     async def delete(self, id: UUID) -> None:
         async with self.session as session:
             async with session.begin():
-                document = await session.get(models.Document, id)
-                if document:
-                    await session.delete(document)
+                # The text is measured by the database rather than loaded
+                deleted = await session.execute(
+                    delete(models.Document)
+                    .where(models.Document.id == id)
+                    .returning(
+                        models.Document.vault_id,
+                        func.coalesce(func.octet_length(models.Document.text), 0),
+                    )
+                )
+                if row := deleted.first():
+                    vault_id, text_bytes = row
+                    await session.execute(
+                        bump_vault_version(vault_id, -1, -text_bytes)
+                    )
+
+    @traced
+    async def get_many(self, ids: typing.List[UUID]) -> typing.List[models.Document]:
+        async with self.session as session:
+            documents = await session.execute(
+                select(models.Document).where(models.Document.id.in_(ids))
+            )
+            return documents.scalars().all()
+
+    @traced
+    async def set_sync_status(
+        self, versions: typing.Dict[UUID, int], status: str, error: str | None = None
+    ) -> int:
+        """Record a sync result for documents still at the sync version it is for.
+
+        `versions` maps document ids to the sync version read before sending them,
+        a document changed meanwhile has a newer result that is kept. Returns how
+        many documents were updated.
+        """
+        if not versions:
+            return 0
+
+        async with self.session as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(models.Document)
+                    .where(
+                        tuple_(models.Document.id, models.Document.sync_version).in_(
+                            list(versions.items())
+                        )
+                    )
+                    .values(
+                        sync_status=status,
+                        sync_error=error,
+                        sync_version=models.Document.sync_version + 1,
+                        sync_updated_at=func.now(),
+                    )
+                )
+                return result.rowcount
 
 
 class VaultRepository(AbstractRepository):
     def __init__(self):
         self.session = Session()
 
+    @traced
     async def add(self, entity) -> None:
         async with self.session as session:
             async with session.begin():
                 session.add(entity)
 
+    @traced
     async def get(self, id: UUID) -> models.Vault | None:
         async with self.session as session:
             vault = await session.get(models.Vault, id)
             return vault
 
-    async def delete(self, id: UUID) -> None:
+    @traced
+    async def delete(self, id: UUID) -> typing.List[typing.Any]:
+        """Delete the vault with its documents and uploads.
+
+        Returns the document id and S3 upload id of the unfinished uploads, whose
+        multipart uploads are left for the caller to abort.
+        """
+        unfinished_uploads = []
+
         async with self.session as session:
             async with session.begin():
                 vault = await session.get(models.Vault, id)
@@ -78,25 +260,134 @@ class VaultRepository(AbstractRepository):
                     for document in documents.scalars().all():
                         await session.delete(document)
 
+                    # Drop upload sessions that still reference the vault
+                    upload_ids = select(models.Upload.id).where(
+                        models.Upload.vault_id == id
+                    )
+                    await session.execute(
+                        delete(models.UploadPart).where(
+                            models.UploadPart.upload_id.in_(upload_ids)
+                        )
+                    )
+                    uploads = await session.execute(
+                        delete(models.Upload)
+                        .where(models.Upload.vault_id == id)
+                        .returning(
+                            models.Upload.document_id,
+                            models.Upload.s3_upload_id,
+                            models.Upload.status,
+                        )
+                    )
+                    unfinished_uploads = [
+                        (document_id, s3_upload_id)
+                        for document_id, s3_upload_id, status in uploads
+                        if status in ("in_progress", "completing")
+                    ]
+                    await session.execute(
+                        delete(models.VaultCreation).where(
+                            models.VaultCreation.vault_id == id
+                        )
+                    )
+
                     await session.delete(vault)
 
+        return unfinished_uploads
+
+    @traced
+    async def clone(
+        self, creation: models.VaultCreation, source_id: UUID
+    ) -> typing.List[UUID]:
+        """Write the new vault with copies of the source vault's documents.
+
+        Documents are copied by the database in one INSERT ... SELECT, their ids
+        derived with clone_document_id. Returns the ids of the source documents.
+        """
+        vault_id = creation.vault.id
+        id_type = models.Document.id.type
+
+        source = select(models.Document).where(models.Document.vault_id == source_id)
+        copies = source.with_only_columns(
+            cast(func.md5(cast(models.Document.id, String) + str(vault_id)), id_type),
+            models.Document.name,
+            models.Document.text,
+            models.Document.preview,
+            literal(vault_id, id_type),
+        )
+
+        async with self.session as session:
+            async with session.begin():
+                session.add(creation)
+                await session.flush()
+
+                await session.execute(
+                    insert(models.Document).from_select(
+                        ["id", "name", "text", "preview", "vault_id"], copies
+                    )
+                )
+                await session.execute(count_vault_statistics(vault_id))
+                document_ids = await session.execute(
+                    source.with_only_columns(models.Document.id)
+                )
+                return document_ids.scalars().all()
+
+    @traced
     async def rename(self, id: UUID, name: str) -> None:
         async with self.session as session:
             async with session.begin():
                 vault = await session.get(models.Vault, id)
                 if vault:
                     vault.name = name
+                    vault.version += 1
+                    vault.updated_at = func.now()
 
+    @traced
     async def get_vault_documents(
-        self, id: UUID
+        self, id: UUID, with_text: bool = False
     ) -> typing.Optional[typing.List[models.Document]]:
         async with self.session as session:
-            # Query and delete all documents associated with the vault
-            documents = await session.execute(
-                select(models.Document).where(models.Document.vault_id == id)
-            )
+            query = select(models.Document).where(models.Document.vault_id == id)
+            if not with_text:
+                # Full texts are not needed for listings, previews are stored separately
+                query = query.options(defer(models.Document.text, raiseload=True))
+
+            documents = await session.execute(query)
             return documents.scalars().all()
 
+    @traced
+    async def get_sync_states(self, id: UUID) -> typing.List[typing.Any]:
+        """Id, sync status, version and last change of every document of the vault."""
+        async with self.session as session:
+            states = await session.execute(
+                select(
+                    models.Document.id,
+                    models.Document.sync_status,
+                    models.Document.sync_version,
+                    models.Document.sync_updated_at,
+                ).where(models.Document.vault_id == id)
+            )
+            return states.all()
+
+    @traced
+    async def get_vault_ids(
+        self, after: UUID | None = None, limit: int = 500
+    ) -> typing.List[UUID]:
+        async with self.session as session:
+            query = select(models.Vault.id).order_by(models.Vault.id).limit(limit)
+            if after is not None:
+                query = query.where(models.Vault.id > after)
+
+            ids = await session.execute(query)
+            return ids.scalars().all()
+
+    @traced
+    async def count_vault_documents(self, id: UUID) -> int:
+        async with self.session as session:
+            count = await session.execute(
+                select(models.Vault.document_count).where(models.Vault.id == id)
+            )
+            return count.scalar_one()
+
+    @traced
     async def get_users_vaults(
         self, user_id: UUID
     ) -> typing.Optional[typing.List[models.Vault]]:
@@ -105,3 +396,206 @@ class VaultRepository(AbstractRepository):
                 select(models.Vault).where(models.Vault.user_id == user_id)
             )
             return vaults.scalars().all()
+
+
+class VaultCreationRepository(AbstractRepository):
+    def __init__(self):
+        self.session = Session()
+
+    @traced
+    async def add(self, entity) -> None:
+        async with self.session as session:
+            async with session.begin():
+                # Cascades to the new vault, both rows are written together
+                session.add(entity)
+
+    @traced
+    async def get(self, vault_id: UUID) -> models.VaultCreation | None:
+        async with self.session as session:
+            creation = await session.get(models.VaultCreation, vault_id)
+            return creation
+
+    @traced
+    async def set_status(
+        self,
+        vault_id: UUID,
+        status: str,
+        error: str | None = None,
+        kb_attempt: bool = False,
+    ) -> None:
+        query = (
+            update(models.VaultCreation)
+            .where(models.VaultCreation.vault_id == vault_id)
+            .values(status=status, last_error=error, updated_at=func.now())
+        )
+        if kb_attempt:
+            query = query.values(kb_attempts=models.VaultCreation.kb_attempts + 1)
+
+        async with self.session as session:
+            async with session.begin():
+                await session.execute(query)
+
+    @traced
+    async def claim_retry(self, vault_id: UUID, stale_after: float) -> bool:
+        """Move a failed, or stuck, knowledge base sync back to syncing.
+
+        A sync is stuck when it has not progressed for `stale_after` seconds, e.g.
+        after the worker running it died. Returns whether this caller claimed it,
+        so concurrent retries run once.
+        """
+        stale = models.VaultCreation.updated_at < func.now() - timedelta(
+            seconds=stale_after
+        )
+        query = (
+            update(models.VaultCreation)
+            .where(
+                models.VaultCreation.vault_id == vault_id,
+                (models.VaultCreation.status == "sync_failed")
+                | ((models.VaultCreation.status == "syncing") & stale),
+            )
+            .values(status="syncing", updated_at=func.now())
+        )
+
+        async with self.session as session:
+            async with session.begin():
+                result = await session.execute(query)
+                return result.rowcount == 1
+
+
+class KnowledgeBaseDeletionRepository(AbstractRepository):
+    def __init__(self):
+        self.session = Session()
+
+    @traced
+    async def add(self, entity) -> None:
+        async with self.session as session:
+            async with session.begin():
+                session.add(entity)
+
+    @traced
+    async def get(self, id: int) -> models.KnowledgeBaseDeletion | None:
+        async with self.session as session:
+            deletion = await session.get(models.KnowledgeBaseDeletion, id)
+            return deletion
+
+    @traced
+    async def get_due(
+        self, limit: int, max_attempts: int
+    ) -> typing.List[models.KnowledgeBaseDeletion]:
+        """Deletions to retry, the least and the longest ago attempted first.
+
+        Deletions failing every time sink behind the others instead of taking the
+        whole batch, those with `max_attempts` failed retries are parked.
+        """
+        async with self.session as session:
+            deletions = await session.execute(
+                select(models.KnowledgeBaseDeletion)
+                .where(models.KnowledgeBaseDeletion.attempts < max_attempts)
+                .order_by(
+                    models.KnowledgeBaseDeletion.attempts,
+                    models.KnowledgeBaseDeletion.last_attempt_at.nulls_first(),
+                    models.KnowledgeBaseDeletion.id,
+                )
+                .limit(limit)
+            )
+            return deletions.scalars().all()
+
+    @traced
+    async def record_failure(self, id: int, error: str) -> int:
+        """Count a failed retry, return the attempts made so far."""
+        async with self.session as session:
+            async with session.begin():
+                attempts = await session.execute(
+                    update(models.KnowledgeBaseDeletion)
+                    .where(models.KnowledgeBaseDeletion.id == id)
+                    .values(
+                        attempts=models.KnowledgeBaseDeletion.attempts + 1,
+                        last_attempt_at=func.now(),
+                        last_error=error,
+                    )
+                    .returning(models.KnowledgeBaseDeletion.attempts)
+                )
+                return attempts.scalar_one()
+
+    @traced
+    async def delete(self, id: int) -> None:
+        async with self.session as session:
+            async with session.begin():
+                await session.execute(
+                    delete(models.KnowledgeBaseDeletion).where(
+                        models.KnowledgeBaseDeletion.id == id
+                    )
+                )
+
+
+class UploadRepository(AbstractRepository):
+    def __init__(self):
+        self.session = Session()
+
+    @traced
+    async def add(self, entity) -> None:
+        async with self.session as session:
+            async with session.begin():
+                session.add(entity)
+
+    @traced
+    async def get(self, id: UUID) -> models.Upload | None:
+        async with self.session as session:
+            upload = await session.get(
+                models.Upload, id, options=[selectinload(models.Upload.parts)]
+            )
+            return upload
+
+    @traced
+    async def get_part(
+        self, upload_id: UUID, part_number: int
+    ) -> models.UploadPart | None:
+        async with self.session as session:
+            part = await session.get(models.UploadPart, (upload_id, part_number))
+            return part
+
+    @traced
+    async def add_part(self, part: models.UploadPart) -> None:
+        async with self.session as session:
+            async with session.begin():
+                # Parts may be re-uploaded when resuming, so overwrite existing rows
+                await session.merge(part)
+
+    @traced
+    async def claim_completion(self, id: UUID) -> bool:
+        """Move an upload from in progress to completing.
+
+        Returns whether this caller claimed it, so concurrent completions run once.
+        """
+        async with self.session as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(models.Upload)
+                    .where(
+                        models.Upload.id == id, models.Upload.status == "in_progress"
+                    )
+                    .values(status="completing")
+                )
+                return result.rowcount == 1
+
+    @traced
+    async def set_status(
+        self, id: UUID, status: str, sha256: str | None = None
+    ) -> None:
+        async with self.session as session:
+            async with session.begin():
+                upload = await session.get(models.Upload, id)
+                if upload:
+                    upload.status = status
+                    upload.sha256 = sha256
+
+    @traced
+    async def delete(self, id: UUID) -> None:
+        async with self.session as session:
+            async with session.begin():
+                await session.execute(
+                    delete(models.UploadPart).where(models.UploadPart.upload_id == id)
+                )
+                await session.execute(
+                    delete(models.Upload).where(models.Upload.id == id)
+                )
@@ -1,11 +1,44 @@
 from abc import ABC, abstractmethod
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, List, Tuple
 from uuid import UUID
 
 from aiobotocore.client import AioBaseClient
+from aiobotocore.config import AioConfig
 from aiobotocore.session import get_session
 
 from src.config import settings
+from src.utils.metrics import S3_REQUESTS_IN_FLIGHT
+from src.utils.tracing import traced
+
+# Client shared by all repositories, opened and closed with the application
+_client: AioBaseClient | None = None
+_client_stack = AsyncExitStack()
+
+
+def get_client_config() -> dict:
+    return {
+        "aws_access_key_id": settings.s3_access_key,
+        "aws_secret_access_key": settings.s3_secret_key,
+        "endpoint_url": settings.s3_endpoint_url,
+        "verify": settings.verify,
+        "config": AioConfig(max_pool_connections=settings.s3_max_pool_connections),
+    }
+
+
+async def init_s3_client() -> None:
+    global _client
+
+    _client = await _client_stack.enter_async_context(
+        get_session().create_client("s3", **get_client_config())
+    )
+
+
+async def close_s3_client() -> None:
+    global _client
+
+    _client = None
+    await _client_stack.aclose()
 
 
 class AbstractRepository(ABC):
@@ -24,27 +57,27 @@ class AbstractRepository(ABC):
 
 class S3Repository(AbstractRepository):
     def __init__(self):
-        self.access_key = settings.s3_access_key
-        self.secret_key = settings.s3_secret_key
-        self.endpoint_url = settings.s3_endpoint_url
         self.bucket_name = settings.s3_bucket_name
-        self.session = get_session()
 
     @asynccontextmanager
     async def get_client(self) -> AioBaseClient:
-        config = {
-            "aws_access_key_id": self.access_key,
-            "aws_secret_access_key": self.secret_key,
-            "endpoint_url": self.endpoint_url,
-            "verify": settings.verify,
-        }
-        async with self.session.create_client("s3", **config) as client:
-            yield client
+        with S3_REQUESTS_IN_FLIGHT.track_inprogress():
+            if _client is not None:
+                yield _client
+                return
 
+            # Outside the application, e.g. in scripts, use a short-lived client
+            async with get_session().create_client(
+                "s3", **get_client_config()
+            ) as client:
+                yield client
+
+    @traced
     async def get(self, id: str) -> str:
         async with self.get_client() as client:
             return await client.get_object(Bucket=self.bucket_name, Key=id)
 
+    @traced
     async def put(self, file: bytes, file_id: UUID) -> None:
         async with self.get_client() as client:
             object_name = str(file_id)
@@ -54,6 +87,85 @@ class S3Repository(AbstractRepository):
                 Body=file,
             )
         
+    @traced
     async def delete(self, name: str):
         async with self.get_client() as client:
             await client.delete_object(Bucket=self.bucket_name, Key=name)
+
+    @traced
+    async def copy(self, source_id: UUID, target_id: UUID) -> None:
+        async with self.get_client() as client:
+            # Copied inside S3, the encrypted bytes never pass through the service
+            await client.copy_object(
+                Bucket=self.bucket_name,
+                Key=str(target_id),
+                CopySource={"Bucket": self.bucket_name, "Key": str(source_id)},
+            )
+
+    @traced
+    async def delete_many(self, names: List[str]) -> None:
+        async with self.get_client() as client:
+            # DeleteObjects accepts up to 1000 keys per request
+            for start in range(0, len(names), 1000):
+                objects = [{"Key": name} for name in names[start : start + 1000]]
+                await client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={"Objects": objects, "Quiet": True},
+                )
+
+    async def iter_chunks(self, id: str, chunk_size: int) -> AsyncIterator[bytes]:
+        async with self.get_client() as client:
+            response = await client.get_object(Bucket=self.bucket_name, Key=id)
+            async with response["Body"] as stream:
+                while chunk := await stream.read(chunk_size):
+                    yield chunk
+
+    @traced
+    async def create_multipart_upload(self, file_id: UUID) -> str:
+        async with self.get_client() as client:
+            response = await client.create_multipart_upload(
+                Bucket=self.bucket_name, Key=str(file_id)
+            )
+            return response["UploadId"]
+
+    @traced
+    async def upload_part(
+        self, file: bytes, file_id: UUID, upload_id: str, part_number: int
+    ) -> str:
+        async with self.get_client() as client:
+            response = await client.upload_part(
+                Bucket=self.bucket_name,
+                Key=str(file_id),
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=file,
+            )
+            return response["ETag"]
+
+    @traced
+    async def complete_multipart_upload(
+        self, file_id: UUID, upload_id: str, parts: List[Tuple[int, str]]
+    ) -> None:
+        async with self.get_client() as client:
+            await client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=str(file_id),
+                UploadId=upload_id,
+                MultipartUpload={
+                    "Parts": [
+                        {"PartNumber": part_number, "ETag": etag}
+                        for part_number, etag in parts
+                    ]
+                },
+            )
+
+    @traced
+    async def abort_multipart_upload(self, file_id: UUID, upload_id: str) -> None:
+        async with self.get_client() as client:
+            await client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=str(file_id), UploadId=upload_id
+            )
+
+    async def ping(self) -> None:
+        async with self.get_client() as client:
+            await client.head_bucket(Bucket=self.bucket_name)
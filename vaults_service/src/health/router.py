@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Response, status
+
+from src.health.schemas import LivenessResponse, ReadinessResponse
+from src.health.utils import get_readiness
+
+health_router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@health_router.get("/live", response_model=LivenessResponse)
+async def live_route():
+    # The event loop answers, dependencies are the readiness probe's concern
+    return LivenessResponse()
+
+
+@health_router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ReadinessResponse}},
+)
+async def ready_route(response: Response):
+    readiness = await get_readiness()
+    if not readiness.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return readiness
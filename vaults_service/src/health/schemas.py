@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class DependencyCheck(BaseModel):
+    name: str
+    ok: bool
+    required: bool  # Whether a failure makes the replica unready
+    latency_ms: float
+    checked_at: datetime
+    detail: Optional[str] = None
+
+
+class PoolStatus(BaseModel):
+    size: int
+    max_overflow: int
+    checked_out: int
+
+
+class LoadStatus(BaseModel):
+    db_pool: PoolStatus
+    ingestions_in_flight: int
+    queued_documents: int
+
+
+class LivenessResponse(BaseModel):
+    status: str = "ok"
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    reasons: List[str]
+    checks: List[DependencyCheck]
+    load: LoadStatus
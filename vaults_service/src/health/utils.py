@@ -0,0 +1,98 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict
+
+from src.config import settings
+from src.database.postgres_repositories import get_pool_status, ping_database
+from src.database.s3_repositories import S3Repository
+from src.health.schemas import (
+    DependencyCheck,
+    LoadStatus,
+    PoolStatus,
+    ReadinessResponse,
+)
+from src.utils.lifecycle import ingestion_queue, ingestions
+from src.utils.requests import ping_kb_service
+
+DEPENDENCIES: Dict[str, Callable[[], Awaitable[None]]] = {
+    "postgres": ping_database,
+    "s3": lambda: S3Repository().ping(),
+    "graph_kb": lambda: ping_kb_service(settings.graph_service_url),
+    "vector_kb": lambda: ping_kb_service(settings.vector_service_url),
+}
+
+# Latest result and its expiry per dependency, probes within the TTL reuse it
+_results: Dict[str, tuple[float, DependencyCheck]] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def run_check(name: str, check: Callable[[], Awaitable[None]]) -> DependencyCheck:
+    start = time.perf_counter()
+    detail = None
+
+    try:
+        await asyncio.wait_for(check(), settings.health_check_timeout)
+    except asyncio.TimeoutError:
+        detail = f"No answer within {settings.health_check_timeout}s"
+    except Exception as error:
+        detail = str(error) or type(error).__name__
+
+    return DependencyCheck(
+        name=name,
+        ok=detail is None,
+        required=name in settings.ready_dependencies,
+        latency_ms=round((time.perf_counter() - start) * 1000, 2),
+        checked_at=datetime.now(timezone.utc),
+        detail=detail,
+    )
+
+
+async def get_check(name: str) -> DependencyCheck:
+    # Concurrent probes wait for the check already running instead of starting another
+    async with _locks.setdefault(name, asyncio.Lock()):
+        cached = _results.get(name)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        result = await run_check(name, DEPENDENCIES[name])
+        _results[name] = (time.monotonic() + settings.health_check_ttl, result)
+
+        return result
+
+
+def get_load_status() -> LoadStatus:
+    return LoadStatus(
+        db_pool=PoolStatus(**get_pool_status()),
+        ingestions_in_flight=ingestions.count,
+        queued_documents=ingestion_queue.count,
+    )
+
+
+async def get_readiness() -> ReadinessResponse:
+    checks = await asyncio.gather(*[get_check(name) for name in DEPENDENCIES])
+    load = get_load_status()
+
+    # Reads never reach the KB services, their outage must not unready every replica
+    reasons = [
+        f"{check.name} unavailable"
+        for check in checks
+        if check.required and not check.ok
+    ]
+
+    pool = load.db_pool
+    capacity = pool.size + pool.max_overflow
+    if pool.checked_out >= capacity * settings.ready_pool_saturation:
+        reasons.append(f"Database pool saturated ({pool.checked_out}/{capacity})")
+
+    max_in_flight = settings.ready_max_in_flight_ingestions
+    if max_in_flight is not None and load.ingestions_in_flight >= max_in_flight:
+        reasons.append(f"{load.ingestions_in_flight} ingestions in flight")
+
+    max_queued = settings.ready_max_queued_documents
+    if max_queued is not None and load.queued_documents >= max_queued:
+        reasons.append(f"{load.queued_documents} documents queued")
+
+    return ReadinessResponse(
+        ready=not reasons, reasons=reasons, checks=checks, load=load
+    )
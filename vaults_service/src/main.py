@@ -1,8 +1,65 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+from src.config import settings
+from src.database.postgres_repositories import (
+    dispose_engine,
+    init_engine,
+    ping_database,
+)
+from src.database.s3_repositories import close_s3_client, init_s3_client
+from src.health.router import health_router
+from src.uploads.router import uploads_router
+from src.utils.lifecycle import ingestions
+from src.utils.metrics import render_metrics
+from src.utils.profiling import ProfilingMiddleware
+from src.utils.rate_limits import close_rate_limit_backend
+from src.utils.readers import shutdown_pdf_executor, warm_up_parsers
+from src.utils.requests import close_http_session, get_http_session
+from src.utils.tracing import setup_tracing, shutdown_tracing
 from src.vaults.router import vaults_router
 
-app = FastAPI()
+
+async def warm_up():
+    try:
+        await ping_database()
+    except Exception as error:
+        # The pool reconnects on demand, a cold start must not keep the worker down
+        logging.warning(f"Database warm-up failed: {error}")
+
+    if settings.warm_up_parsers:
+        await asyncio.to_thread(warm_up_parsers)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Created per worker process, after the server has forked
+    setup_tracing()
+    init_engine()
+    await init_s3_client()
+    get_http_session()
+
+    await warm_up()
+
+    yield
+
+    await ingestions.wait_idle(settings.graceful_shutdown_timeout)
+
+    await close_http_session()
+    await close_rate_limit_backend()
+    await close_s3_client()
+    await dispose_engine()
+    shutdown_pdf_executor()
+    shutdown_tracing()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(ProfilingMiddleware)
 
 
 @app.get("/")
@@ -10,4 +67,15 @@ async def root():
     return {"message": "Hello from vaults_service"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    content, media_type = render_metrics()
+    return Response(content, media_type=media_type)
+
+
+app.include_router(health_router)
 app.include_router(vaults_router)
+app.include_router(uploads_router)
+
+# Server spans for incoming requests, the parents of repository and KB spans
+FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,health")
@@ -0,0 +1,27 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import Body, Query
+from fastapi.exceptions import HTTPException
+
+from src.database.postgres_repositories import UploadRepository
+
+
+async def _check_upload(upload_id: UUID) -> UploadRepository:
+    upload_repository = UploadRepository()
+
+    upload = await upload_repository.get(upload_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    return upload_repository
+
+
+async def upload_exists(upload_id: Annotated[UUID, Body(embed=True)]) -> UploadRepository:
+    return await _check_upload(upload_id)
+
+
+async def upload_exists_in_query(
+    upload_id: Annotated[UUID, Query()]
+) -> UploadRepository:
+    return await _check_upload(upload_id)
@@ -0,0 +1,78 @@
+from typing import Annotated, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Body, Depends, Header, Query, Request, status
+
+from src.database.postgres_repositories import UploadRepository
+from src.uploads.dependencies import upload_exists, upload_exists_in_query
+from src.uploads.schemas import (
+    CompletedUploadResponse,
+    InitUploadRequest,
+    UploadPartResponse,
+    UploadResponse,
+)
+from src.uploads.utils import (
+    abort_upload,
+    complete_upload,
+    get_upload,
+    init_upload,
+    upload_part,
+)
+from src.vaults.dependencies import vault_exists
+
+uploads_router = APIRouter(tags=["Uploads"])
+
+
+@uploads_router.post(
+    "/init_upload", status_code=status.HTTP_201_CREATED, response_model=UploadResponse
+)
+async def init_upload_route(
+    init_upload_request: Annotated[InitUploadRequest, Body()],
+):
+    await vault_exists(init_upload_request.vault_id)
+    return await init_upload(init_upload_request)
+
+
+@uploads_router.put(
+    "/upload_part", status_code=status.HTTP_200_OK, response_model=UploadPartResponse
+)
+async def upload_part_route(
+    upload_id: Annotated[UUID, Query()],
+    part_number: Annotated[int, Query(ge=1)],
+    upload_repository: Annotated[UploadRepository, Depends(upload_exists_in_query)],
+    request: Request,
+    x_content_sha256: Annotated[Optional[str], Header()] = None,
+):
+    return await upload_part(
+        upload_id, part_number, request.stream(), upload_repository, x_content_sha256
+    )
+
+
+@uploads_router.post(
+    "/complete_upload",
+    status_code=status.HTTP_201_CREATED,
+    response_model=CompletedUploadResponse,
+)
+async def complete_upload_route(
+    upload_id: Annotated[UUID, Body(embed=True)],
+    upload_repository: Annotated[UploadRepository, Depends(upload_exists)],
+):
+    return await complete_upload(upload_id, upload_repository)
+
+
+@uploads_router.delete("/abort_upload", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload_route(
+    upload_id: Annotated[UUID, Body(embed=True)],
+    upload_repository: Annotated[UploadRepository, Depends(upload_exists)],
+) -> None:
+    await abort_upload(upload_id, upload_repository)
+
+
+@uploads_router.post(
+    "/get_upload", status_code=status.HTTP_200_OK, response_model=UploadResponse
+)
+async def get_upload_route(
+    upload_id: Annotated[UUID, Body(embed=True)],
+    upload_repository: Annotated[UploadRepository, Depends(upload_exists)],
+):
+    return await get_upload(upload_id, upload_repository)
@@ -0,0 +1,53 @@
+from enum import Enum
+from typing import List
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from src.vaults.schemas import VaultChangesResponse
+
+
+class UploadStatus(str, Enum):
+    IN_PROGRESS = "in_progress"
+    COMPLETING = "completing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class InitUploadRequest(BaseModel):
+    vault_id: UUID
+    filename: str
+    content_type: str
+    size: int = Field(..., gt=0, description="Total size of the file in bytes")
+
+
+class UploadPartResponse(BaseModel):
+    part_number: int
+    size: int
+    sha256: str
+
+    class Config:
+        from_attributes = True
+
+
+class UploadResponse(BaseModel):
+    id: UUID
+    vault_id: UUID
+    document_id: UUID
+    filename: str
+    content_type: str
+    size: int
+    chunk_size: int = Field(
+        ..., description="Every part except the last one must be exactly this size"
+    )
+    part_count: int
+    status: UploadStatus
+    parts: List[UploadPartResponse] = Field(
+        ..., description="Parts received so far, resume from the first missing one"
+    )
+
+
+class CompletedUploadResponse(BaseModel):
+    upload_id: UUID
+    sha256: str = Field(..., description="SHA-256 of the assembled file")
+    vault: VaultChangesResponse
@@ -0,0 +1,372 @@
+import hashlib
+import logging
+import math
+import uuid
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, BinaryIO, Optional
+from uuid import UUID
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+from Crypto.Util.Padding import pad, unpad
+from fastapi import UploadFile
+from fastapi.exceptions import HTTPException
+from starlette.datastructures import Headers
+
+from src.config import settings
+from src.database.models import Document, Upload, UploadPart
+from src.database.postgres_repositories import (
+    DocumentRepository,
+    UploadRepository,
+    VaultRepository,
+)
+from src.database.s3_repositories import S3Repository
+from src.uploads.schemas import (
+    CompletedUploadResponse,
+    InitUploadRequest,
+    UploadPartResponse,
+    UploadResponse,
+    UploadStatus,
+)
+from src.utils.exceptions import (
+    CorruptObject,
+    EmptyFile,
+    UnreadableFile,
+    UnsupportedFileType,
+)
+from src.utils.lifecycle import ingestions
+from src.utils.metrics import get_file_type, observe_stage
+from src.utils.rate_limits import enforce_rate_limits
+from src.utils.readers import (
+    detect_content_type,
+    is_accepted_content_type,
+    make_preview,
+    read_document,
+)
+from src.vaults.schemas import DocumentResponse, VaultChangesResponse
+from src.vaults.utils import add_document_to_knowledge_base, derive_key
+
+# Encrypted objects start with the salt and IV, see encrypt_data
+HEADER_SIZE = 32
+
+
+def get_part_count(upload: Upload) -> int:
+    return math.ceil(upload.size / upload.chunk_size)
+
+
+def get_part_size(upload: Upload, part_number: int) -> int:
+    if part_number < get_part_count(upload):
+        return upload.chunk_size
+    return upload.size - upload.chunk_size * (part_number - 1)
+
+
+def make_upload_response(upload: Upload) -> UploadResponse:
+    return UploadResponse(
+        id=upload.id,
+        vault_id=upload.vault_id,
+        document_id=upload.document_id,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        size=upload.size,
+        chunk_size=upload.chunk_size,
+        part_count=get_part_count(upload),
+        status=upload.status,
+        parts=[UploadPartResponse.model_validate(part) for part in upload.parts],
+    )
+
+
+def ensure_in_progress(upload: Upload) -> None:
+    if upload.status != UploadStatus.IN_PROGRESS:
+        raise HTTPException(status_code=409, detail=f"Upload is {upload.status}")
+
+
+async def decrypt_object(
+    s3_repository: S3Repository, key: UUID, output: BinaryIO, chunk_size: int
+) -> str:
+    """Stream an encrypted S3 object into `output`, returning the plaintext SHA-256."""
+    digest = hashlib.sha256()
+    header = b""
+    cipher = None
+    pending = b""
+
+    async for chunk in s3_repository.iter_chunks(str(key), chunk_size):
+        if cipher is None:
+            header += chunk
+            if len(header) < HEADER_SIZE:
+                continue
+            salt, iv, chunk = header[:16], header[16:HEADER_SIZE], header[HEADER_SIZE:]
+            key_bytes = derive_key(settings.encryption_password, salt)
+            cipher = AES.new(key_bytes, AES.MODE_CBC, iv)
+
+        pending += chunk
+        # Hold back the final block, it carries the padding
+        cut = ((len(pending) - 1) // AES.block_size) * AES.block_size
+        if cut > 0:
+            plaintext = cipher.decrypt(pending[:cut])
+            pending = pending[cut:]
+            digest.update(plaintext)
+            output.write(plaintext)
+
+    # Shorter than the header and one block, or cut off within a block
+    if cipher is None or not pending or len(pending) % AES.block_size:
+        raise CorruptObject(key)
+    try:
+        plaintext = unpad(cipher.decrypt(pending), AES.block_size)
+    except ValueError as e:
+        raise CorruptObject(key, "Invalid padding in encrypted object") from e
+    digest.update(plaintext)
+    output.write(plaintext)
+
+    return digest.hexdigest()
+
+
+async def init_upload(init_upload_request: InitUploadRequest) -> UploadResponse:
+    if not is_accepted_content_type(init_upload_request.content_type):
+        raise HTTPException(
+            status_code=406,
+            detail=UnsupportedFileType(init_upload_request.content_type).message,
+        )
+
+    vault = await VaultRepository().get(init_upload_request.vault_id)
+    # The whole file is charged up front, parts are not limited separately
+    await enforce_rate_limits(vault.user_id, init_upload_request.size)
+
+    document_id = uuid.uuid4()  # The assembled object is stored under the document id
+    s3_upload_id = await S3Repository().create_multipart_upload(document_id)
+
+    upload = Upload(
+        id=uuid.uuid4(),
+        document_id=document_id,
+        vault_id=init_upload_request.vault_id,
+        filename=init_upload_request.filename,
+        content_type=init_upload_request.content_type,
+        size=init_upload_request.size,
+        chunk_size=settings.upload_chunk_size,
+        s3_upload_id=s3_upload_id,
+        salt=get_random_bytes(16),
+        iv=get_random_bytes(16),
+        status=UploadStatus.IN_PROGRESS,
+        parts=[],
+    )
+    await UploadRepository().add(upload)
+
+    logging.info(f"Upload started: {upload.filename} ({upload.size} bytes)")
+
+    return make_upload_response(upload)
+
+
+async def get_upload(
+    upload_id: UUID, upload_repository: UploadRepository
+) -> UploadResponse:
+    upload = await upload_repository.get(upload_id)
+    return make_upload_response(upload)
+
+
+async def upload_part(
+    upload_id: UUID,
+    part_number: int,
+    stream: AsyncIterator[bytes],
+    upload_repository: UploadRepository,
+    content_sha256: Optional[str] = None,
+) -> UploadPartResponse:
+    """Encrypt a part of the file on the fly and store it as an S3 multipart part.
+
+    Parts are chained with AES-CBC, so the assembled object has the same layout as
+    one produced by encrypt_data. Part N is encrypted with the last ciphertext
+    block of part N - 1 as its IV, which is why parts must arrive in order.
+    """
+    upload = await upload_repository.get(upload_id)
+    ensure_in_progress(upload)
+
+    part_count = get_part_count(upload)
+    if part_number > part_count:
+        raise HTTPException(
+            status_code=400, detail=f"Upload has only {part_count} parts"
+        )
+
+    if part_number == 1:
+        iv = upload.iv
+    else:
+        previous_part = await upload_repository.get_part(upload.id, part_number - 1)
+        if not previous_part:
+            raise HTTPException(
+                status_code=409, detail=f"Part {part_number - 1} not uploaded yet"
+            )
+        iv = previous_part.last_block
+
+    expected_size = get_part_size(upload, part_number)
+    cipher = AES.new(
+        derive_key(settings.encryption_password, upload.salt), AES.MODE_CBC, iv
+    )
+    digest = hashlib.sha256()
+    body = bytearray(upload.salt + upload.iv if part_number == 1 else b"")
+    pending = b""
+    received = 0
+
+    async for chunk in stream:
+        received += len(chunk)
+        if received > expected_size:
+            raise HTTPException(
+                status_code=400, detail=f"Part {part_number} exceeds {expected_size} bytes"
+            )
+
+        digest.update(chunk)
+        pending += chunk
+        aligned = len(pending) - len(pending) % AES.block_size
+        body += cipher.encrypt(pending[:aligned])
+        pending = pending[aligned:]
+
+    if received != expected_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Part {part_number} must be {expected_size} bytes, got {received}",
+        )
+
+    sha256 = digest.hexdigest()
+    if content_sha256 and content_sha256.lower() != sha256:
+        raise HTTPException(status_code=400, detail="Part checksum mismatch")
+
+    # Later parts are encrypted from this part's last block, changing it would
+    # corrupt them. Identical re-sends encrypt to the same bytes and are fine.
+    stored_part = await upload_repository.get_part(upload.id, part_number)
+    if (
+        stored_part
+        and stored_part.sha256 != sha256
+        and await upload_repository.get_part(upload.id, part_number + 1)
+    ):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Part {part_number} differs from the stored part, which later "
+            "parts are chained to",
+        )
+
+    if part_number == part_count:
+        body += cipher.encrypt(pad(pending, AES.block_size))
+
+    etag = await S3Repository().upload_part(
+        bytes(body), upload.document_id, upload.s3_upload_id, part_number
+    )
+
+    part = UploadPart(
+        upload_id=upload.id,
+        part_number=part_number,
+        size=received,
+        etag=etag,
+        sha256=sha256,
+        last_block=bytes(body[-AES.block_size :]),
+    )
+    await upload_repository.add_part(part)
+
+    return UploadPartResponse.model_validate(part)
+
+
+async def fail_completion(upload: Upload, upload_repository: UploadRepository) -> None:
+    # Once assembled the multipart upload is gone, so the upload cannot be resumed
+    await S3Repository().delete(str(upload.document_id))
+    await upload_repository.set_status(upload.id, UploadStatus.FAILED)
+
+
+@ingestions.tracked
+async def complete_upload(
+    upload_id: UUID, upload_repository: UploadRepository
+) -> CompletedUploadResponse:
+    upload = await upload_repository.get(upload_id)
+    ensure_in_progress(upload)
+
+    part_numbers = [part.part_number for part in upload.parts]
+    if part_numbers != list(range(1, get_part_count(upload) + 1)):
+        raise HTTPException(status_code=409, detail="Upload has missing parts")
+
+    # Concurrent completions of the same upload must not assemble it twice
+    if not await upload_repository.claim_completion(upload.id):
+        raise HTTPException(status_code=409, detail="Upload is already completing")
+
+    s3_repository = S3Repository()
+    try:
+        await s3_repository.complete_multipart_upload(
+            upload.document_id,
+            upload.s3_upload_id,
+            [(part.part_number, part.etag) for part in upload.parts],
+        )
+    except Exception:
+        # Nothing was assembled, the upload can be completed again
+        await upload_repository.set_status(upload.id, UploadStatus.IN_PROGRESS)
+        raise
+
+    try:
+        with SpooledTemporaryFile(max_size=upload.chunk_size) as buffer:
+            sha256 = await decrypt_object(
+                s3_repository, upload.document_id, buffer, upload.chunk_size
+            )
+            buffer.seek(0)
+
+            file = UploadFile(
+                buffer,
+                size=upload.size,
+                filename=upload.filename,
+                headers=Headers({"content-type": upload.content_type}),
+            )
+            content_type = await detect_content_type(file)
+            with observe_stage("parse", get_file_type(content_type)):
+                text = await read_document(file, content_type)
+
+        if text == "":
+            raise EmptyFile()
+    except (UnsupportedFileType, UnreadableFile, EmptyFile) as e:
+        await fail_completion(upload, upload_repository)
+        raise HTTPException(status_code=406, detail=e.message)
+    except Exception:
+        await fail_completion(upload, upload_repository)
+        raise
+
+    document = Document(
+        id=upload.document_id,
+        name=upload.filename,
+        text=text,
+        preview=make_preview(text),
+        vault_id=upload.vault_id,
+    )
+    try:
+        await DocumentRepository().add(document)
+    except Exception:
+        await fail_completion(upload, upload_repository)
+        raise
+    await upload_repository.set_status(upload.id, UploadStatus.COMPLETED, sha256)
+
+    try:
+        await add_document_to_knowledge_base(
+            vault_id=upload.vault_id, document=document
+        )
+    except Exception as e:
+        logging.error(e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error adding documents to knowledge base {upload.vault_id}",
+        )
+
+    vault_repository = VaultRepository()
+    vault = await vault_repository.get(upload.vault_id)
+
+    return CompletedUploadResponse(
+        upload_id=upload.id,
+        sha256=sha256,
+        vault=VaultChangesResponse(
+            id=vault.id,
+            name=vault.name,
+            type=vault.type,
+            created_at=vault.created_at,
+            user_id=vault.user_id,
+            documents=[DocumentResponse.model_validate(document)],
+            document_count=await vault_repository.count_vault_documents(vault.id),
+        ),
+    )
+
+
+async def abort_upload(upload_id: UUID, upload_repository: UploadRepository) -> None:
+    upload = await upload_repository.get(upload_id)
+    ensure_in_progress(upload)
+
+    await S3Repository().abort_multipart_upload(
+        upload.document_id, upload.s3_upload_id
+    )
+    await upload_repository.delete(upload.id)
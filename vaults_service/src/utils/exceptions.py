@@ -12,4 +12,31 @@ class EmptyFile(Exception):
 
     def __init__(self, message="Empty file"):
         self.message = f"{message}"
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+
+
+class UnreadableFile(Exception):
+    """Exception raised for files their reader fails on, e.g. corrupt files."""
+
+    def __init__(self, filename, message="Unreadable file"):
+        self.filename = filename
+        self.message = f"{message}: {filename}"
+        super().__init__(self.message)
+
+
+class KBServiceUnavailable(Exception):
+    """Exception raised when a knowledge base service is not called at all."""
+
+    def __init__(self, service, reason):
+        self.service = service
+        self.message = f"{service} knowledge base service unavailable: {reason}"
+        super().__init__(self.message)
+
+
+class CorruptObject(Exception):
+    """Exception raised for stored objects that cannot be decrypted, e.g. truncated."""
+
+    def __init__(self, key, message="Corrupt encrypted object"):
+        self.key = key
+        self.message = f"{message}: {key}"
+        super().__init__(self.message)
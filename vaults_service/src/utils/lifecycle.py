@@ -0,0 +1,75 @@
+import asyncio
+import functools
+import inspect
+import logging
+from contextlib import asynccontextmanager
+
+from src.utils.metrics import INGESTION_QUEUE_DEPTH, INGESTIONS_IN_FLIGHT
+
+
+class InFlightTracker:
+    """Counts running units of work so shutdown can wait for them to finish."""
+
+    def __init__(self):
+        self.count = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @asynccontextmanager
+    async def track(self):
+        self.count += 1
+        self._idle.clear()
+        INGESTIONS_IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            self.count -= 1
+            INGESTIONS_IN_FLIGHT.dec()
+            if self.count == 0:
+                self._idle.set()
+
+    def tracked(self, func):
+        """Decorator tracking every call of a coroutine or async generator function."""
+        if inspect.isasyncgenfunction(func):
+
+            @functools.wraps(func)
+            async def generator_wrapper(*args, **kwargs):
+                async with self.track():
+                    async for item in func(*args, **kwargs):
+                        yield item
+
+            return generator_wrapper
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with self.track():
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    async def wait_idle(self, timeout: float) -> None:
+        if self.count:
+            logging.info(f"Waiting for {self.count} in-flight ingestions to finish")
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Shutting down with {self.count} ingestions in flight")
+
+
+class QueueDepth:
+    """Counts documents accepted by bulk ingestion but not picked up by a worker yet."""
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, n: int = 1) -> None:
+        self.count += n
+        INGESTION_QUEUE_DEPTH.inc(n)
+
+    def remove(self, n: int = 1) -> None:
+        self.count -= n
+        INGESTION_QUEUE_DEPTH.dec(n)
+
+
+ingestions = InFlightTracker()
+ingestion_queue = QueueDepth()
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.config import settings
+
+if TYPE_CHECKING:
+    from pyinstrument import Profiler
+
+
+class ProfilingMiddleware:
+    """Profile requests with pyinstrument and store HTML reports.
+
+    A request is profiled when it carries the profiling header, when it is picked
+    by random sampling, or, if a latency threshold is set, always; in the last
+    case the report is only kept when the request turned out to be slow.
+    Everything is off unless `settings.profiling_enabled` is set.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.profiling_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        requested = Headers(scope=scope).get(settings.profiling_header) == "1"
+        sampled = random.random() < settings.profiling_sample_rate
+        threshold = settings.profiling_threshold_ms
+
+        if not (requested or sampled or threshold is not None):
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+
+        profiler = Profiler(interval=settings.profiling_interval, async_mode="enabled")
+        profiler.start()
+        start = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            if requested or sampled or elapsed_ms >= threshold:
+                # Rendering the HTML report is slow, keep it off the event loop
+                await asyncio.to_thread(save_report, profiler, scope, elapsed_ms)
+
+
+def save_report(profiler: "Profiler", scope: Scope, elapsed_ms: float) -> None:
+    output_dir = Path(settings.profiling_output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    route = re.sub(r"[^\w]+", "_", scope["path"]).strip("_") or "root"
+    path = output_dir / f"{timestamp}-{scope['method']}-{route}-{elapsed_ms:.0f}ms.html"
+
+    path.write_text(profiler.output_html())
+    logging.info(f"Profile of {scope['method']} {scope['path']} saved to {path}")
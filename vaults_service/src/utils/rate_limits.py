@@ -0,0 +1,155 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from uuid import UUID
+
+from fastapi.exceptions import HTTPException
+
+from src.config import settings
+
+# Token bucket, shared by the in-process and the Redis backend. A request is
+# admitted once the bucket holds its cost, capped at the bucket capacity, and
+# the full cost is then taken; a file larger than the burst is accepted from a
+# full bucket and leaves it in debt, so the next request waits until it refills.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated_at) * rate)
+
+local required = math.min(cost, capacity)
+if tokens < required then
+    return tostring((required - tokens) / rate)
+end
+
+redis.call("HSET", KEYS[1], "tokens", tokens - cost, "updated_at", now)
+redis.call("EXPIRE", KEYS[1], math.ceil((capacity - tokens + cost) / rate) + 1)
+return "0"
+"""
+
+
+class AbstractRateLimitBackend(ABC):
+    @abstractmethod
+    async def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        """Take `cost` tokens, return 0 or the seconds to wait before retrying."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryRateLimitBackend(AbstractRateLimitBackend):
+    """Buckets kept in the worker process, every server worker has its own."""
+
+    max_buckets = 10_000
+
+    def __init__(self):
+        # Tokens, last update and when the bucket is full again, per key, the least
+        # recently updated first
+        self.buckets: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+
+    async def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        tokens, updated_at, _ = self.buckets.get(key, (capacity, now, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+        required = min(cost, capacity)
+        if tokens < required:
+            return (required - tokens) / rate
+
+        if key not in self.buckets and len(self.buckets) >= self.max_buckets:
+            # Refilled buckets are the same as missing ones
+            self.buckets = OrderedDict(
+                (name, bucket)
+                for name, bucket in self.buckets.items()
+                if bucket[2] > now
+            )
+            # Too many users still active, forget the least recently seen ones
+            while len(self.buckets) >= self.max_buckets:
+                self.buckets.popitem(last=False)
+
+        tokens -= cost
+        self.buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        self.buckets.move_to_end(key)
+        return 0
+
+
+class RedisRateLimitBackend(AbstractRateLimitBackend):
+    """Buckets shared by all workers and replicas, in Redis or a compatible server."""
+
+    def __init__(self, url: str):
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(url)
+        self.script = self.redis.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        retry_after = await self.script(
+            keys=[f"vaults:rate_limit:{key}"], args=[capacity, rate, cost]
+        )
+        return float(retry_after)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+_backend: AbstractRateLimitBackend | None = None
+
+
+def get_rate_limit_backend() -> AbstractRateLimitBackend:
+    global _backend
+
+    if _backend is None:
+        if settings.rate_limit_backend == "redis":
+            _backend = RedisRateLimitBackend(settings.rate_limit_redis_url)
+        else:
+            _backend = InMemoryRateLimitBackend()
+
+    return _backend
+
+
+async def close_rate_limit_backend() -> None:
+    global _backend
+
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+
+async def enforce_rate_limits(user_id: UUID, upload_bytes: int = 0) -> None:
+    """Charge one request and the uploaded bytes to the user's budgets.
+
+    Raises a 429 with `Retry-After` when either budget is exhausted.
+    """
+    if not settings.rate_limit_enabled:
+        return
+
+    backend = get_rate_limit_backend()
+
+    retry_after = await backend.take(
+        f"{user_id}:requests",
+        cost=1,
+        rate=settings.rate_limit_requests_per_second,
+        capacity=settings.rate_limit_request_burst,
+    )
+    if not retry_after and upload_bytes:
+        retry_after = await backend.take(
+            f"{user_id}:bytes",
+            cost=upload_bytes,
+            rate=settings.rate_limit_bytes_per_second,
+            capacity=settings.rate_limit_byte_burst,
+        )
+
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
@@ -1,87 +1,566 @@
+import asyncio
+import math
+import multiprocessing
+import os
 import re
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from tempfile import NamedTemporaryFile
+from typing import Awaitable, BinaryIO, Callable, Dict
 
-import fitz
-from docx import Document
 from fastapi import UploadFile
+from opentelemetry import trace
 
-from src.utils.exceptions import UnsupportedFileType
+from src.config import settings
+from src.utils.exceptions import UnreadableFile, UnsupportedFileType
+from src.utils.tracing import traced
+
+_pdf_executor: ProcessPoolExecutor | None = None
+
+
+PREVIEW_LENGTH = 200
+
+_whitespace = re.compile(r"\s")
+
+
+def normalize_text(text: str) -> str:
+    lines = text.split("\n")
+    last_line = lines.pop()  # Not followed by a newline, so left untouched
+
+    # Drop spaces and tabs before every newline
+    lines = [line.rstrip(" \t") for line in lines]
+    lines.append(last_line)
+
+    return "\n".join(lines).replace("-\n", "")  # Remove line breaks inside of words
+
+
+class TextNormalizer:
+    """Incremental normalize_text for text extracted chunk by chunk.
+
+    Everything normalize_text rewrites ends with a newline, so complete lines are
+    normalized as they arrive and only the trailing partial line is carried over.
+    """
+
+    def __init__(self):
+        self.carry = ""
+
+    def feed(self, chunk: str) -> str:
+        buffer = self.carry + chunk
+        cut = buffer.rfind("\n") + 1
+        self.carry = buffer[cut:]
+        return normalize_text(buffer[:cut])
+
+    def close(self) -> str:
+        text, self.carry = self.carry, ""
+        return text
 
 
 async def process_text(text: str) -> str:
-    text = re.sub(
-        r"[ \t]+\n", "\n", text
-    )  # Replace any number of spaces followed by a newline with just a newline
-    text = text.replace("-\n", "")  # Remove line breaks inside of words
+    return normalize_text(text)
 
+
+def make_preview(text: str) -> str:
+    if len(text) > PREVIEW_LENGTH:
+        # Cut at the first whitespace character after the preview length
+        if match := _whitespace.search(text, PREVIEW_LENGTH):
+            return text[: match.start()] + "..."
+        return text[:PREVIEW_LENGTH] + "..."  # No whitespace found
     return text
 
 
+Reader = Callable[[UploadFile], Awaitable[str]]
+
+# Reader per content type, formats are added with @register_reader
+READERS: Dict[str, Reader] = {}
+
+# Live view of READERS, so formats registered later are accepted too
+ACCEPTED_CONTENT_TYPES = READERS.keys()
+
+# Declared by clients that do not know better, the content decides
+GENERIC_CONTENT_TYPES = {None, "", "application/octet-stream", "binary/octet-stream"}
+
+
+def register_reader(*content_types: str) -> Callable[[Reader], Reader]:
+    def register(reader: Reader) -> Reader:
+        for content_type in content_types:
+            READERS[content_type] = reader
+        return reader
+
+    return register
+
+
+def parse_content_type(content_type: str | None) -> str | None:
+    # "Text/Plain; charset=utf-8" -> "text/plain"
+    if content_type is None:
+        return None
+    return content_type.split(";")[0].strip().lower()
+
+
+def is_accepted_content_type(content_type: str | None) -> bool:
+    content_type = parse_content_type(content_type)
+    return content_type in READERS or content_type in GENERIC_CONTENT_TYPES
+
+
+_WORD = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Run elements standing for characters, w:br is a newline only when it wraps text
+_DOCX_CHARACTERS = {
+    f"{_WORD}tab": "\t",
+    f"{_WORD}ptab": "\t",
+    f"{_WORD}cr": "\n",
+    f"{_WORD}noBreakHyphen": "-",
+}
+
+
+def get_docx_paragraph_text(paragraph) -> str:
+    parts = []
+    for element in paragraph.iter(f"{_WORD}t", f"{_WORD}br", *_DOCX_CHARACTERS):
+        if element.tag == f"{_WORD}t":
+            parts.append(element.text or "")
+        elif element.tag == f"{_WORD}br":
+            if element.get(f"{_WORD}type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            parts.append(_DOCX_CHARACTERS[element.tag])
+
+    return "".join(parts)
+
+
+def extract_docx(file: BinaryIO) -> str:
+    """Paragraphs of word/document.xml in document order, table cells included.
+
+    The XML is parsed as it is decompressed and every paragraph is dropped once
+    read, so memory does not grow with the document. Paragraphs nested in other
+    paragraphs, i.e. text boxes, are skipped: Word stores them twice.
+    """
+    from lxml import etree
+
+    texts = []
+    table_depth = paragraph_depth = 0
+
+    with zipfile.ZipFile(file) as archive:
+        with archive.open("word/document.xml") as document:
+            for event, element in etree.iterparse(
+                document,
+                events=("start", "end"),
+                tag=(f"{_WORD}p", f"{_WORD}tbl"),
+                resolve_entities=False,
+            ):
+                if element.tag == f"{_WORD}tbl":
+                    table_depth += 1 if event == "start" else -1
+                    continue
+                if event == "start":
+                    paragraph_depth += 1
+                    continue
+
+                paragraph_depth -= 1
+                if not paragraph_depth:
+                    text = get_docx_paragraph_text(element)
+                    # Empty paragraphs are blank lines, empty table cells are nothing
+                    if text or not table_depth:
+                        texts.append(text)
+
+                element.clear(keep_tail=True)
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+    return "\n".join(texts)
+
+
+@register_reader(
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+)
+@traced
 async def read_docx(file: UploadFile) -> str:
-    # Read the uploaded file into an in-memory bytes buffer
-    content = await file.read()
-    buffer = BytesIO(content)
+    # Read straight from the spooled upload, the archive is not loaded in memory
+    text = await asyncio.to_thread(extract_docx, file.file)
+
+    return await process_text(text)
+
+
+def warm_up_parsers() -> None:
+    # fitz and lxml are imported on first use, this moves the cost to startup
+    import fitz  # noqa: F401
+    from lxml import etree  # noqa: F401
+
+
+def shutdown_pdf_executor() -> None:
+    global _pdf_executor
+
+    if _pdf_executor is not None:
+        _pdf_executor.shutdown(cancel_futures=True)
+        _pdf_executor = None
+
+
+def get_pdf_worker_count() -> int:
+    # Share the CPUs with the other server worker processes by default
+    cpus_per_worker = (os.cpu_count() or 1) // max(settings.web_concurrency, 1)
+    return settings.pdf_extraction_workers or max(cpus_per_worker, 1)
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    global _pdf_executor
+
+    if _pdf_executor is None:
+        # Spawn instead of fork, the parent runs an event loop and fitz state
+        _pdf_executor = ProcessPoolExecutor(
+            max_workers=get_pdf_worker_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
 
-    # Load the buffer content into a Document object
-    document = Document(buffer)
+    return _pdf_executor
+
+
+def extract_pdf_pages(path: str, start: int, stop: int) -> str:
+    import fitz
+
+    with fitz.open(path) as pdf_document:
+        return "".join(pdf_document[i].get_text() for i in range(start, stop))
+
+
+def extract_pdf(file_content: bytes) -> str:
+    import fitz
+
+    normalizer = TextNormalizer()
     texts = []
 
-    for element in document.element.body:
-        if element.tag.endswith("p"):  # Paragraph
-            texts.append(element.text)
-        elif element.tag.endswith("tbl"):  # Table
-            for row in element:
-                for cell in row:
-                    if cell.text:
-                        texts.append(cell.text)
+    with fitz.open(stream=file_content, filetype="pdf") as pdf_document:
+        for page in pdf_document:
+            texts.append(normalizer.feed(page.get_text()))
 
-    # Combine all paragraphs and table contents into a single string
-    text = "\n".join(texts)
+    texts.append(normalizer.close())
+    return "".join(texts)
 
-    return text
 
+@traced
+async def extract_pdf_in_parallel(file_content: bytes, page_count: int) -> str:
+    executor = get_pdf_executor()
+    pages_per_worker = math.ceil(page_count / get_pdf_worker_count())
 
-async def read_pdf(file: UploadFile) -> str:
-    text = ""
+    # Workers open the document from a shared temp file instead of pickling the bytes
+    with NamedTemporaryFile(suffix=".pdf", delete=False) as pdf_file:
+        pdf_file.write(file_content)
+
+    try:
+        loop = asyncio.get_running_loop()
+        texts = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    executor,
+                    extract_pdf_pages,
+                    pdf_file.name,
+                    start,
+                    min(start + pages_per_worker, page_count),
+                )
+                for start in range(0, page_count, pages_per_worker)
+            ]
+        )
+    finally:
+        os.remove(pdf_file.name)
 
+    normalizer = TextNormalizer()
+    normalized_texts = [normalizer.feed(text) for text in texts]
+    normalized_texts.append(normalizer.close())
+
+    return "".join(normalized_texts)
+
+
+def count_pdf_text_pages(file_content: bytes) -> int:
+    """Page count of the PDF, or 0 when it has no text layer to extract."""
+    import fitz
+
+    with fitz.open(stream=file_content, filetype="pdf") as pdf_document:
+        page_count = pdf_document.page_count
+        # Scans without OCR use no fonts, their text layer is empty
+        if any(pdf_document.get_page_fonts(i) for i in range(page_count)):
+            return page_count
+
+    return 0
+
+
+@register_reader("application/pdf")
+@traced
+async def read_pdf(file: UploadFile) -> str:
     # Read uploaded file in-memory
     with file.file as file_stream:
         file_content = file_stream.read()
 
-        with fitz.open(stream=file_content, filetype="pdf") as pdf_document:
-            for page in pdf_document:
-                text += page.get_text()
+    page_count = await asyncio.to_thread(count_pdf_text_pages, file_content)
+    if not page_count:
+        return ""
 
-    return text
+    if (
+        page_count < max(settings.pdf_parallel_page_threshold, 1)
+        or get_pdf_worker_count() == 1
+    ):
+        return await asyncio.to_thread(extract_pdf, file_content)
+
+    return await extract_pdf_in_parallel(file_content, page_count)
 
 
+@register_reader("text/plain")
+@traced
 async def read_plain_text(file: UploadFile) -> str:
     contents = await file.read()
     text = contents.decode("utf-8")
 
+    return await process_text(text)
+
+
+_markdown_syntax = [
+    (re.compile(r"^ {0,3}([-*_] *){3,}$", re.M), ""),  # Horizontal rules
+    (re.compile(r"^ {0,3}(```|~~~).*$", re.M), ""),  # Code fences
+    (re.compile(r"!?\[([^\]]*)\]\([^)]*\)"), r"\1"),  # Links and images keep text
+    (re.compile(r"^ {0,3}(#{1,6} +|> ?|[-*+] +)", re.M), ""),  # Block markers
+    (re.compile(r"(\*\*?|`)(?=\S)(.+?)(?<=\S)\1"), r"\2"),  # Emphasis and code
+    (re.compile(r"(?<!\w)(__?)(?=\S)(.+?)(?<=\S)\1(?!\w)"), r"\2"),
+]
+
+
+def strip_markdown(text: str) -> str:
+    for pattern, replacement in _markdown_syntax:
+        text = pattern.sub(replacement, text)
     return text
 
 
-async def read_document(file: UploadFile) -> str:
-    accepted_types = {
-        "text/plain",
-        "application/pdf",
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    }
+@register_reader("text/markdown", "text/x-markdown")
+@traced
+async def read_markdown(file: UploadFile) -> str:
+    contents = await file.read()
+    text = strip_markdown(contents.decode("utf-8"))
 
-    if file.content_type not in accepted_types:
-        raise UnsupportedFileType(file.content_type)
+    return await process_text(text)
 
-    if file.content_type == "text/plain":
-        text = await read_plain_text(file)
-    elif file.content_type == "application/pdf":
-        text = await read_pdf(file)
-    elif (
-        file.content_type
-        == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    ):
-        text = await read_docx(file)
 
-    processed_text = await process_text(text)
+# Elements ending a line of text, the others flow into their surroundings
+_HTML_BLOCKS = """
+    address article aside blockquote br dd div dl dt figcaption footer h1 h2 h3 h4
+    h5 h6 header hr li main nav ol p pre section table td th title tr ul
+""".split()
+
+_spaces = re.compile(r"\s+")
+
+
+def extract_html(contents: bytes) -> str:
+    import lxml.html
+    from lxml import etree
+
+    try:
+        # lxml follows the charset declared by the document
+        document = lxml.html.document_fromstring(contents)
+    except etree.ParserError:
+        return ""  # Nothing but whitespace
+
+    etree.strip_elements(
+        document,
+        etree.Comment,
+        "script",
+        "style",
+        "noscript",
+        "template",
+        with_tail=False,
+    )
+
+    # Source formatting is not text, only block elements break lines
+    for element in document.iter():
+        if element.text and element.tag != "pre":
+            element.text = _spaces.sub(" ", element.text)
+        if element.tail:
+            element.tail = _spaces.sub(" ", element.tail)
+    for element in document.iter(*_HTML_BLOCKS):
+        element.tail = "\n" + (element.tail or "")
+
+    lines = (line.strip() for line in document.text_content().split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+@register_reader("text/html", "application/xhtml+xml")
+@traced
+async def read_html(file: UploadFile) -> str:
+    contents = await file.read()
+    text = await asyncio.to_thread(extract_html, contents)
+
+    return await process_text(text)
+
+
+@register_reader("application/rtf", "text/rtf")
+@traced
+async def read_rtf(file: UploadFile) -> str:
+    from striprtf.striprtf import rtf_to_text
+
+    contents = await file.read()
+    # RTF is 7-bit, other characters are escaped and decoded by rtf_to_text
+    text = await asyncio.to_thread(
+        rtf_to_text, contents.decode("latin-1"), errors="ignore"
+    )
+
+    return await process_text(text)
+
+
+_ODF_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+_ODF_PARAGRAPHS = (f"{_ODF_TEXT}p", f"{_ODF_TEXT}h")
+
+
+def get_odf_paragraph_text(paragraph) -> str:
+    from lxml import etree
+
+    parts = []
+    for event, element in etree.iterwalk(paragraph, events=("start", "end")):
+        if event == "end":
+            if element is not paragraph and element.tail:
+                parts.append(element.tail)
+        elif element.tag == f"{_ODF_TEXT}s":  # Runs of spaces
+            parts.append(" " * int(element.get(f"{_ODF_TEXT}c", 1)))
+        elif element.tag == f"{_ODF_TEXT}tab":
+            parts.append("\t")
+        elif element.tag == f"{_ODF_TEXT}line-break":
+            parts.append("\n")
+        elif element.text:
+            parts.append(element.text)
+
+    return "".join(parts)
+
+
+def extract_odt(contents: bytes) -> str:
+    from lxml import etree
+
+    with zipfile.ZipFile(BytesIO(contents)) as archive:
+        with archive.open("content.xml") as content:
+            root = etree.parse(content).getroot()
+
+    return "\n".join(
+        get_odf_paragraph_text(paragraph)
+        for paragraph in root.iter(*_ODF_PARAGRAPHS)
+        # Paragraphs of notes are part of the paragraph holding the note
+        if next(paragraph.iterancestors(*_ODF_PARAGRAPHS), None) is None
+    )
+
+
+@register_reader("application/vnd.oasis.opendocument.text")
+@traced
+async def read_odt(file: UploadFile) -> str:
+    contents = await file.read()
+    text = await asyncio.to_thread(extract_odt, contents)
+
+    return await process_text(text)
+
+
+SNIFF_LENGTH = 2048
+
+# Formats recognized by their first bytes
+_SIGNATURES = {
+    b"%PDF-": "application/pdf",
+    b"{\\rtf": "application/rtf",
+}
+
+# Text formats without a signature are told apart by the declared type or extension
+_TEXT_CONTENT_TYPES = {"text/plain", "text/markdown", "text/x-markdown", "text/html"}
+_TEXT_EXTENSIONS = {
+    ".md": "text/markdown",
+    ".markdown": "text/markdown",
+    ".htm": "text/html",
+    ".html": "text/html",
+}
+
+_html_start = re.compile(
+    rb"\s*(<!--.*?-->\s*)*<(!doctype\s+html|html)[\s>]", re.IGNORECASE | re.DOTALL
+)
+
+
+def sniff_zip_content_type(file) -> str | None:
+    try:
+        # OpenDocument stores its type uncompressed as the first member
+        head = file.read(SNIFF_LENGTH)
+        if head[30:38] == b"mimetype":
+            size = int.from_bytes(head[18:22], "little")
+            return head[38 : 38 + size].decode("ascii", errors="replace")
+
+        # The member list is at the end of the archive
+        with zipfile.ZipFile(file) as archive:
+            names = set(archive.namelist())
+    except zipfile.BadZipFile:
+        return None
+    finally:
+        file.seek(0)
+
+    if "word/document.xml" in names:
+        return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    return None
+
+
+def sniff_text_content_type(head: bytes, declared: str | None, filename: str | None):
+    if b"\x00" in head:
+        return None  # Binary, or text in an encoding the readers do not decode
+
+    if _html_start.match(head.removeprefix(b"\xef\xbb\xbf")):
+        return "text/html"
+    if declared in _TEXT_CONTENT_TYPES:
+        return declared
+
+    _, extension = os.path.splitext(filename or "")
+    return _TEXT_EXTENSIONS.get(extension.lower(), "text/plain")
+
+
+@traced
+async def detect_content_type(file: UploadFile) -> str | None:
+    """Content type of the upload, from its first bytes rather than the client.
+
+    Returns None for formats without a reader.
+    """
+    declared = parse_content_type(file.content_type)
+
+    head = await file.read(SNIFF_LENGTH)
+    await file.seek(0)
+
+    for signature, content_type in _SIGNATURES.items():
+        if head.startswith(signature):
+            return content_type
+
+    if head.startswith(b"PK\x03\x04"):
+        content_type = await asyncio.to_thread(sniff_zip_content_type, file.file)
+    else:
+        content_type = sniff_text_content_type(head, declared, file.filename)
+
+    return content_type if content_type in READERS else None
+
+
+def get_parse_errors() -> tuple:
+    """Errors the parsers raise on corrupt or misencoded content."""
+    import fitz
+    from lxml import etree
+
+    return (
+        UnicodeDecodeError,
+        zipfile.BadZipFile,
+        zlib.error,
+        KeyError,  # A part missing from a DOCX or ODT archive
+        etree.XMLSyntaxError,
+        fitz.FileDataError,
+    )
+
+
+@traced
+async def read_document(file: UploadFile, content_type: str | None = None) -> str:
+    """Text of the upload, read by the reader of its detected content type."""
+    if file.size == 0:
+        return ""  # Nothing to detect or parse
+
+    if content_type is None:
+        content_type = await detect_content_type(file)
+
+    span = trace.get_current_span()
+    span.set_attribute("file.content_type", str(file.content_type))
+    span.set_attribute("file.detected_content_type", str(content_type))
+
+    if content_type not in READERS:
+        raise UnsupportedFileType(file.content_type)
 
-    return processed_text
+    try:
+        # Readers normalize their output, PDFs page by page while extracting
+        return await READERS[content_type](file)
+    except get_parse_errors() as e:
+        # Corrupt or misencoded content is the client's input, other errors are
+        # server faults
+        raise UnreadableFile(file.filename) from e
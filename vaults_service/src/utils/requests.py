@@ -1,89 +1,246 @@
+import asyncio
+import logging
+import time
+
 import aiohttp
+from pydantic import BaseModel
+from pydantic_core import to_json
 
 from src.vaults.schemas import (
     AddDocumentRequestToKBService,
     CreateRequestToKBService,
     DeleteDocumentRequestToKBService,
     DropRequestToKBService,
+    ListDocumentsRequestToKBService,
 )
 
 from src.config import settings
+from src.utils.exceptions import KBServiceUnavailable
+from src.utils.metrics import KB_CIRCUIT_OPEN, KB_REQUESTS_IN_FLIGHT
+from src.utils.tracing import get_trace_headers, traced
+
+# Session shared by all KB requests, opened and closed with the application
+_session: aiohttp.ClientSession | None = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    global _session
+
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession()
+
+    return _session
+
+
+async def close_http_session() -> None:
+    global _session
+
+    if _session is not None:
+        await _session.close()
+        _session = None
 
+
+def get_json_headers() -> dict:
+    # Bodies are serialized straight from the models, aiohttp does not label them
+    return {"Content-Type": "application/json", **get_trace_headers()}
+
+
+async def ping_kb_service(service_url: str) -> None:
+    async with get_http_session().get(
+        f"{service_url}{settings.kb_health_path}"
+    ) as response:
+        response.raise_for_status()
+
+
+class CircuitBreaker:
+    """Fails calls fast after repeated failures, until a trial call succeeds.
+
+    After `failure_threshold` consecutive failures the circuit opens for
+    `reset_timeout` seconds, then lets a single trial call through: its success
+    closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, service: str, failure_threshold: int, reset_timeout: float):
+        self.service = service
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.trial_in_flight:
+            return False
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+
+        self.trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        if self.is_open:
+            logging.info(f"Circuit to the {self.service} KB service closed")
+            KB_CIRCUIT_OPEN.labels(service=self.service).set(0)
+
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_in_flight = False
+
+        if self.is_open or self.failures >= self.failure_threshold:
+            if not self.is_open:
+                logging.warning(f"Circuit to the {self.service} KB service opened")
+                KB_CIRCUIT_OPEN.labels(service=self.service).set(1)
+            self.opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        # The trial call ended without an answer, e.g. it was cancelled
+        self.trial_in_flight = False
+
+
+class KBServiceClient:
+    """Requests to one knowledge base service, with timeouts, a circuit breaker
+    and a bound on the requests in flight from this worker."""
+
+    def __init__(self, service: str):
+        self.service = service
+        self.breaker = CircuitBreaker(
+            service,
+            failure_threshold=settings.kb_breaker_failure_threshold,
+            reset_timeout=settings.kb_breaker_reset_timeout,
+        )
+        self.slots = asyncio.Semaphore(settings.kb_max_concurrency)
+
+    @property
+    def base_url(self) -> str:
+        return getattr(settings, f"{self.service}_service_url")
+
+    def get_timeout(self, endpoint: str) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=settings.kb_timeouts.get(endpoint, settings.kb_default_timeout),
+            connect=settings.kb_connect_timeout,
+        )
+
+    async def request(self, method: str, endpoint: str, body: BaseModel) -> dict:
+        if not self.breaker.allow():
+            raise KBServiceUnavailable(self.service, "circuit open")
+
+        try:
+            # Waiting callers are bounded too, instead of piling up behind the slots
+            await asyncio.wait_for(self.slots.acquire(), settings.kb_queue_timeout)
+        except asyncio.TimeoutError:
+            self.breaker.release_trial()
+            raise KBServiceUnavailable(self.service, "too many requests in flight")
+
+        try:
+            with KB_REQUESTS_IN_FLIGHT.labels(service=self.service).track_inprogress():
+                async with get_http_session().request(
+                    method,
+                    f"{self.base_url}/{endpoint}",
+                    data=to_json(body),
+                    headers=get_json_headers(),
+                    timeout=self.get_timeout(endpoint),
+                ) as response:
+                    response.raise_for_status()
+                    result = await response.json()
+        except aiohttp.ClientResponseError as e:
+            # Rejected requests are the caller's problem, not a sign of ill health
+            if e.status >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+        finally:
+            self.slots.release()
+
+        self.breaker.record_success()
+        return result
+
+
+graph_kb_client = KBServiceClient("graph")
+vector_kb_client = KBServiceClient("vector")
+
+
+@traced
 async def send_create_request_to_graph_kb_service(
     body: CreateRequestToKBService,
 ) -> dict:
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"{settings.graph_service_url}/create", json=body
-        ) as response:
-            return await response.json()
+    return await graph_kb_client.request("POST", "create", body)
 
 
+@traced
 async def send_add_document_request_to_graph_kb_service(
     body: AddDocumentRequestToKBService,
 ) -> dict:
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"{settings.graph_service_url}/add_document", json=body
-        ) as response:
-            return await response.json()
+    return await graph_kb_client.request("POST", "add_document", body)
 
 
+@traced
 async def send_drop_request_to_graph_kb_service(
     body: DropRequestToKBService,
 ) -> dict:
-    async with aiohttp.ClientSession() as session:
-        async with session.delete(
-            f"{settings.graph_service_url}/drop", json=body
-        ) as response:
-            return await response.json()
+    return await graph_kb_client.request("DELETE", "drop", body)
 
 
+@traced
 async def send_delete_document_request_to_graph_kb_service(
     body: DeleteDocumentRequestToKBService,
 ) -> dict:
-    async with aiohttp.ClientSession() as session:
-        async with session.delete(
-            f"{settings.graph_service_url}/delete_document", json=body
-        ) as response:
-            return await response.json()
+    return await graph_kb_client.request("DELETE", "delete_document", body)
 
 
+@traced
+async def send_list_documents_request_to_graph_kb_service(
+    body: ListDocumentsRequestToKBService,
+) -> dict:
+    return await graph_kb_client.request("POST", "list_documents", body)
+
+
+@traced
 async def send_create_request_to_vector_kb_service(
     body: CreateRequestToKBService,
 ) -> dict:
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                f"{settings.vector_service_url}/create", json=body
-        ) as response:
-            return await response.json()
+    return await vector_kb_client.request("POST", "create", body)
 
 
+@traced
 async def send_add_document_request_to_vector_kb_service(
     body: AddDocumentRequestToKBService,
 ) -> dict:
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                f"{settings.vector_service_url}/add_document", json=body
-        ) as response:
-            return await response.json()
+    return await vector_kb_client.request("POST", "add_document", body)
 
 
+@traced
 async def send_drop_request_to_vector_kb_service(
     body: DropRequestToKBService,
 ) -> dict:
-    async with aiohttp.ClientSession() as session:
-        async with session.delete(
-                f"{settings.vector_service_url}/drop", json=body
-        ) as response:
-            return await response.json()
+    return await vector_kb_client.request("DELETE", "drop", body)
 
 
+@traced
 async def send_delete_document_request_to_vector_kb_service(
     body: DeleteDocumentRequestToKBService,
 ) -> dict:
-    async with aiohttp.ClientSession() as session:
-        async with session.delete(
-                f"{settings.vector_service_url}/delete_document", json=body
-        ) as response:
-            return await response.json()
+    return await vector_kb_client.request("DELETE", "delete_document", body)
+
+
+@traced
+async def send_list_documents_request_to_vector_kb_service(
+    body: ListDocumentsRequestToKBService,
+) -> dict:
+    return await vector_kb_client.request("POST", "list_documents", body)
@@ -0,0 +1,60 @@
+import functools
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+from src.config import settings
+
+tracer = trace.get_tracer("vaults_service")
+_provider: TracerProvider | None = None
+
+
+def setup_tracing() -> None:
+    """Install the span exporter selected by `settings.tracing_exporter`."""
+    global _provider
+
+    if settings.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    elif settings.tracing_exporter == "file":
+        exporter = ConsoleSpanExporter(
+            out=open(settings.tracing_file_path, "a"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    else:
+        return  # Spans stay no-ops
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name})
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+
+
+def shutdown_tracing() -> None:
+    """Flush spans still buffered by the batch processor."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def traced(func):
+    """Run an async function inside a span named after its qualified name."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with tracer.start_as_current_span(func.__qualname__):
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+def get_trace_headers() -> dict:
+    """Headers carrying the current trace context to downstream services."""
+    headers = {}
+    propagate.inject(headers)
+    return headers
@@ -0,0 +1,238 @@
+"""Bring the knowledge base services back in line with the documents table.
+
+For every vault, the document ids held by its knowledge base are listed in
+batches and compared with the documents table. Documents the knowledge base
+holds are marked synced, missing ones are sent again, and ids it holds for
+deleted documents are removed. Deletions that failed earlier are retried first.
+
+Run periodically from vaults_service: python -m src.vaults.reconciliation
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Set
+from uuid import UUID
+
+from src.config import settings
+from src.database.models import Vault
+from src.database.postgres_repositories import (
+    DocumentRepository,
+    KnowledgeBaseDeletionRepository,
+    VaultCreationRepository,
+    VaultRepository,
+    dispose_engine,
+    init_engine,
+)
+from src.utils.requests import (
+    close_http_session,
+    send_list_documents_request_to_graph_kb_service,
+    send_list_documents_request_to_vector_kb_service,
+)
+from src.vaults.schemas import (
+    DocumentSyncStatus,
+    ListDocumentsRequestToKBService,
+    ReconciliationReport,
+    VaultCreationStatus,
+    VaultType,
+)
+from src.vaults.utils import (
+    add_document_to_knowledge_base,
+    create_knowledge_base,
+    delete_document_from_knowledge_base,
+    drop_knowledge_base,
+)
+
+
+async def list_knowledge_base_documents(vault: Vault) -> Set[UUID]:
+    document_ids = set()
+    after = None
+
+    while True:
+        body = ListDocumentsRequestToKBService(
+            vault_id=vault.id, after=after, limit=settings.reconcile_batch_size
+        )
+        if vault.type == VaultType.GRAPH:
+            page = await send_list_documents_request_to_graph_kb_service(body)
+        else:
+            page = await send_list_documents_request_to_vector_kb_service(body)
+
+        ids = [UUID(id) for id in page["document_ids"]]
+        document_ids.update(ids)
+
+        if len(ids) < settings.reconcile_batch_size:
+            return document_ids
+        after = ids[-1]
+
+
+async def resend_documents(vault: Vault, versions: Dict[UUID, int]) -> tuple[int, int]:
+    """Send documents to the knowledge base again, return how many were sent and
+    how many of those failed.
+
+    `versions` holds the sync version each document was found missing at.
+    """
+    semaphore = asyncio.Semaphore(max(settings.reconcile_concurrency, 1))
+
+    async def resend(document) -> None:
+        async with semaphore:
+            await add_document_to_knowledge_base(vault.id, document, vault.type)
+
+    sent = failed = 0
+    document_ids = list(versions)
+    document_repository = DocumentRepository()
+    for start in range(0, len(document_ids), settings.reconcile_batch_size):
+        # Texts are loaded one batch at a time
+        batch = document_ids[start : start + settings.reconcile_batch_size]
+        documents = [
+            document
+            for document in await document_repository.get_many(batch)
+            # Synced by someone else since the states were read
+            if document.sync_version == versions[document.id]
+        ]
+
+        results = await asyncio.gather(
+            *[resend(document) for document in documents], return_exceptions=True
+        )
+        sent += len(documents)
+        failed += sum(isinstance(result, Exception) for result in results)
+
+    return sent, failed
+
+
+async def reconcile_vault(vault: Vault) -> ReconciliationReport:
+    report = ReconciliationReport(vault_id=vault.id)
+
+    # Creations in progress or awaiting a retry own the knowledge base for now
+    creation = await VaultCreationRepository().get(vault.id)
+    if creation and creation.status != VaultCreationStatus.COMPLETED:
+        report.skipped = True
+        return report
+
+    kb_ids = await list_knowledge_base_documents(vault)
+    states = await VaultRepository().get_sync_states(vault.id)
+    report.documents = len(states)
+    report.kb_documents = len(kb_ids)
+
+    # Pending documents are left to the request still sending them, unless stale
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.reconcile_grace_period
+    )
+    # Versions as read, updates skip documents whose sync state changed since
+    confirmed, missing = {}, {}
+    for state in states:
+        if state.id in kb_ids:
+            if state.sync_status != DocumentSyncStatus.SYNCED:
+                confirmed[state.id] = state.sync_version
+        elif (
+            state.sync_status != DocumentSyncStatus.PENDING
+            or state.sync_updated_at < cutoff
+        ):
+            missing[state.id] = state.sync_version
+
+    if confirmed:
+        report.confirmed = await DocumentRepository().set_sync_status(
+            confirmed, DocumentSyncStatus.SYNCED
+        )
+
+    if missing and not kb_ids:
+        # The knowledge base lost the whole vault, create it again with every
+        # document, including those still being sent
+        documents = await VaultRepository().get_vault_documents(
+            vault.id, with_text=True
+        )
+        try:
+            await create_knowledge_base(vault.id, documents, vault.type)
+        except Exception as e:
+            logging.error(e)
+            report.resend_failed = len(documents)
+        report.resent = len(documents) - report.resend_failed
+    elif missing:
+        sent, report.resend_failed = await resend_documents(vault, missing)
+        report.resent = sent - report.resend_failed
+
+    stored_ids = {state.id for state in states}
+    for document_id in kb_ids - stored_ids:
+        await delete_document_from_knowledge_base(vault.id, vault.type, document_id)
+        report.removed += 1
+
+    return report
+
+
+async def retry_knowledge_base_deletions() -> None:
+    deletion_repository = KnowledgeBaseDeletionRepository()
+
+    deletions = await deletion_repository.get_due(
+        settings.reconcile_batch_size, settings.kb_deletion_max_attempts
+    )
+    for deletion in deletions:
+        try:
+            if deletion.document_id is None:
+                await drop_knowledge_base(deletion.vault_id, deletion.vault_type)
+            else:
+                await delete_document_from_knowledge_base(
+                    deletion.vault_id, deletion.vault_type, deletion.document_id
+                )
+        except Exception as e:
+            logging.error(e)
+            attempts = await deletion_repository.record_failure(deletion.id, str(e))
+            if attempts >= settings.kb_deletion_max_attempts:
+                logging.error(
+                    f"Parked knowledge base deletion {deletion.id} after "
+                    f"{attempts} attempts: {e}"
+                )
+            continue
+
+        await deletion_repository.delete(deletion.id)
+
+
+async def reconcile_all() -> None:
+    await retry_knowledge_base_deletions()
+
+    vault_repository = VaultRepository()
+    after = None
+    while vault_ids := await vault_repository.get_vault_ids(
+        after, settings.reconcile_batch_size
+    ):
+        for vault_id in vault_ids:
+            vault = await vault_repository.get(vault_id)
+            if vault is None:
+                continue  # Deleted meanwhile
+
+            try:
+                report = await reconcile_vault(vault)
+            except Exception as e:
+                # The knowledge base is unreachable, try again on the next run
+                logging.error(f"Reconciliation of vault {vault_id} failed: {e}")
+                continue
+
+            changes = report.confirmed + report.resent + report.resend_failed
+            if changes or report.removed:
+                logging.info(f"Reconciled vault: {report.model_dump_json()}")
+
+        after = vault_ids[-1]
+
+
+async def run(vault_id: UUID | None) -> None:
+    init_engine()
+    try:
+        if vault_id is None:
+            await reconcile_all()
+        else:
+            vault = await VaultRepository().get(vault_id)
+            report = await reconcile_vault(vault)
+            logging.info(f"Reconciled vault: {report.model_dump_json()}")
+    finally:
+        await close_http_session()
+        await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vault-id", type=UUID, help="Only reconcile this vault")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.vault_id))
+
+
+if __name__ == "__main__":
+    main()
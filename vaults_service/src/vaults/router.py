@@ -1,49 +1,146 @@
-from typing import Annotated, List
+from typing import Annotated, List, Optional, Union
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Body, Depends, File, UploadFile, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Body,
+    Depends,
+    File,
+    Header,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse
 
 from src.database.postgres_repositories import DocumentRepository, VaultRepository
+from src.utils.rate_limits import enforce_rate_limits
+from src.vaults.reconciliation import reconcile_vault
 from src.vaults.dependencies import document_exists, vault_exists
 from src.vaults.schemas import (
+    CloneVaultRequest,
     CreateVaultRequest,
     DocumentResponse,
+    VaultChangesResponse,
+    VaultCreationResponse,
+    ReconciliationReport,
     VaultPreviewResponse,
     VaultResponse,
 )
 from src.vaults.utils import (
     add_document,
+    add_documents,
+    clone_vault,
     create_vault,
     delete_document,
     delete_vault,
     get_document_by_id,
     get_users_vaults,
     get_vault_by_id,
+    get_vault_creation,
     get_vault_documents,
+    retry_vault_creation,
+    spool_upload,
 )
 
 vaults_router = APIRouter(tags=["Vaults & Documents"])
 
 
 @vaults_router.post(
-    "/create_vault", status_code=status.HTTP_201_CREATED, response_model=VaultResponse
+    "/create_vault",
+    status_code=status.HTTP_201_CREATED,
+    response_model=Union[VaultResponse, VaultChangesResponse],
 )
 async def create_vault_route(
     create_vault_request: Annotated[CreateVaultRequest, Body()],
     files: Annotated[List[UploadFile], File(...)],
+    only_changes: Annotated[bool, Query()] = False,
 ):
-    return await create_vault(create_vault_request, files)
+    return await create_vault(create_vault_request, files, only_changes)
 
 
 @vaults_router.post(
-    "/add_document", status_code=status.HTTP_201_CREATED, response_model=VaultResponse
+    "/clone_vault",
+    status_code=status.HTTP_201_CREATED,
+    response_model=VaultResponse,
+)
+async def clone_vault_route(
+    clone_vault_request: Annotated[CloneVaultRequest, Body()],
+):
+    vault_repository = await vault_exists(clone_vault_request.vault_id)
+    return await clone_vault(clone_vault_request, vault_repository)
+
+
+@vaults_router.post(
+    "/retry_vault_creation",
+    status_code=status.HTTP_200_OK,
+    response_model=VaultResponse,
+)
+async def retry_vault_creation_route(
+    vault_id: Annotated[UUID, Body(embed=True)],
+    vault_repository: Annotated[VaultRepository, Depends(vault_exists)],
+):
+    return await retry_vault_creation(vault_id, vault_repository)
+
+
+@vaults_router.post(
+    "/reconcile_vault",
+    status_code=status.HTTP_200_OK,
+    response_model=ReconciliationReport,
+)
+async def reconcile_vault_route(
+    vault_id: Annotated[UUID, Body(embed=True)],
+    vault_repository: Annotated[VaultRepository, Depends(vault_exists)],
+):
+    return await reconcile_vault(await vault_repository.get(vault_id))
+
+
+@vaults_router.post(
+    "/get_vault_creation",
+    status_code=status.HTTP_200_OK,
+    response_model=VaultCreationResponse,
+)
+async def get_vault_creation_route(vault_id: Annotated[UUID, Body(embed=True)]):
+    return await get_vault_creation(vault_id)
+
+
+@vaults_router.post(
+    "/add_document",
+    status_code=status.HTTP_201_CREATED,
+    response_model=Union[VaultResponse, VaultChangesResponse],
 )
 async def add_document_route(
     vault_id: Annotated[UUID, Body(embed=True)],
     vault_repository: Annotated[VaultRepository, Depends(vault_exists)],
     file: UploadFile,
+    only_changes: Annotated[bool, Query()] = False,
+):
+    return await add_document(vault_id, file, vault_repository, only_changes)
+
+
+@vaults_router.post(
+    "/add_documents",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+)
+async def add_documents_route(
+    vault_id: Annotated[UUID, Body(embed=True)],
+    vault_repository: Annotated[VaultRepository, Depends(vault_exists)],
+    files: Annotated[List[UploadFile], File(...)],
 ):
-    return await add_document(vault_id, file, vault_repository)
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+
+    vault = await vault_repository.get(vault_id)
+    await enforce_rate_limits(vault.user_id, sum(file.size or 0 for file in files))
+
+    spooled_files = [await spool_upload(file) for file in files]
+    return StreamingResponse(
+        add_documents(vault, spooled_files), media_type="application/x-ndjson"
+    )
 
 
 @vaults_router.delete("/delete_vault", status_code=status.HTTP_204_NO_CONTENT)
@@ -82,8 +179,12 @@ async def rename_vault(
 async def get_vault_documents_route(
     vault_id: Annotated[UUID, Body(embed=True)],
     vault_repository: Annotated[VaultRepository, Depends(vault_exists)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
-    return await get_vault_documents(vault_id, vault_repository)
+    return await get_vault_documents(
+        vault_id, vault_repository, response, if_none_match
+    )
 
 
 @vaults_router.post(
@@ -91,8 +192,12 @@ async def get_vault_documents_route(
     status_code=status.HTTP_200_OK,
     response_model=List[VaultPreviewResponse],
 )
-async def get_users_vaults_route(user_id: Annotated[UUID, Body(embed=True)]):
-    return await get_users_vaults(user_id)
+async def get_users_vaults_route(
+    user_id: Annotated[UUID, Body(embed=True)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    return await get_users_vaults(user_id, response, if_none_match)
 
 
 @vaults_router.post(
@@ -103,8 +208,10 @@ async def get_users_vaults_route(user_id: Annotated[UUID, Body(embed=True)]):
 async def get_vault_by_id_route(
     vault_id: Annotated[UUID, Body(embed=True)],
     vault_repository: Annotated[VaultRepository, Depends(vault_exists)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
-    return await get_vault_by_id(vault_id, vault_repository)
+    return await get_vault_by_id(vault_id, vault_repository, response, if_none_match)
 
 
 @vaults_router.post(
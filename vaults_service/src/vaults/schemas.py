@@ -1,11 +1,10 @@
 import json
-import re
 from datetime import datetime
 from enum import Enum
-from typing import List
+from typing import List, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field, model_validator, validator
+from pydantic import AliasChoices, BaseModel, Field, model_validator
 
 
 class VaultType(str, Enum):
@@ -26,6 +25,16 @@ class CreateVaultRequest(BaseModel):
         return value
 
 
+class CloneVaultRequest(BaseModel):
+    vault_id: UUID
+    vault_name: Optional[str] = Field(
+        None, description="Defaults to the source vault's name"
+    )
+    vault_type: Optional[VaultType] = Field(
+        None, description="Defaults to the source vault's type"
+    )
+
+
 class DocumentText(BaseModel):
     document_id: UUID
     document_name: str
@@ -51,23 +60,41 @@ class DeleteDocumentRequestToKBService(BaseModel):
     document_id: UUID
 
 
+class ListDocumentsRequestToKBService(BaseModel):
+    vault_id: UUID
+    after: Optional[UUID] = None  # Ids are listed in ascending order, after this one
+    limit: int
+
+
+class DocumentSyncStatus(str, Enum):
+    PENDING = "pending"  # Not acknowledged by the knowledge base yet
+    SYNCED = "synced"
+    FAILED = "failed"
+
+
+class ReconciliationReport(BaseModel):
+    vault_id: UUID
+    skipped: bool = Field(
+        False, description="The vault is still being created and was left alone"
+    )
+    documents: int = 0
+    kb_documents: int = 0
+    confirmed: int = Field(0, description="Held by the knowledge base, marked synced")
+    resent: int = 0
+    resend_failed: int = 0
+    removed: int = Field(0, description="Held by the knowledge base only, deleted")
+
+
 class DocumentResponse(BaseModel):
     id: UUID
     name: str
     text: str = Field(
-        ..., description="A preview of the text around the first 200 characters"
+        ...,
+        description="A preview of the text around the first 200 characters",
+        validation_alias=AliasChoices("preview", "text"),
     )
     vault_id: UUID
 
-    @validator("text", pre=True, always=True)
-    def text_max_length(cls, v):
-        if isinstance(v, str) and len(v) > 200:
-            # Find the index of the first whitespace character after the 100th character
-            if match := re.search(r"\s", v[200:]):
-                return v[: (match.start() + 200)] + "..."
-            return v[:200] + "..."  # Return first 200 characters if no whitespace found
-        return v
-
     class Config:
         from_attributes = True
 
@@ -84,10 +111,71 @@ class VaultResponse(BaseModel):
         from_attributes = True
 
 
+class VaultChangesResponse(BaseModel):
+    id: UUID
+    name: str
+    type: VaultType
+    created_at: datetime
+    user_id: UUID
+    documents: List[DocumentResponse] = Field(
+        ..., description="Only the documents created or affected by the request"
+    )
+    document_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class VaultCreationStatus(str, Enum):
+    STORING = "storing"  # Parsing, storing rows and uploading objects
+    SYNCING = "syncing"  # Creating the knowledge base
+    SYNC_FAILED = "sync_failed"  # Documents kept, the knowledge base can be retried
+    COMPLETED = "completed"
+
+
+class VaultCreationResponse(BaseModel):
+    vault_id: UUID
+    status: VaultCreationStatus
+    kb_attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class VaultPreviewResponse(BaseModel):
     id: UUID
     name: str
     type: VaultType
+    document_count: int
+    total_bytes: int = Field(description="UTF-8 size of the documents' texts")
+    last_modified: Optional[datetime] = Field(
+        None, validation_alias=AliasChoices("last_modified", "updated_at")
+    )
 
     class Config:
         from_attributes = True
+
+
+class DocumentIngestStatus(str, Enum):
+    ADDED = "added"
+    REJECTED = "rejected"
+    FAILED = "failed"
+
+
+class DocumentIngestEvent(BaseModel):
+    event: Literal["document"] = "document"
+    filename: str
+    status: DocumentIngestStatus
+    document_id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+
+class BulkIngestSummary(BaseModel):
+    event: Literal["summary"] = "summary"
+    vault_id: UUID
+    added: int
+    rejected: int
+    failed: int
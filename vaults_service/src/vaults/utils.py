@@ -1,7 +1,8 @@
 import asyncio
 import logging
 import uuid
-from typing import List
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, List
 from uuid import UUID
 
 from Crypto.Cipher import AES
@@ -9,16 +10,25 @@ from Crypto.Hash import HMAC, SHA256
 from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Random import get_random_bytes
 from Crypto.Util.Padding import pad
-from fastapi import BackgroundTasks, UploadFile
-from fastapi.encoders import jsonable_encoder
+from fastapi import BackgroundTasks, Response, UploadFile
 from fastapi.exceptions import HTTPException
 
 from src.config import settings
-from src.database.models import Document, Vault
-from src.database.postgres_repositories import DocumentRepository, VaultRepository
+from src.database.models import Document, KnowledgeBaseDeletion, Vault, VaultCreation
+from src.database.postgres_repositories import (
+    DocumentRepository,
+    KnowledgeBaseDeletionRepository,
+    VaultCreationRepository,
+    VaultRepository,
+    clone_document_id,
+)
 from src.database.s3_repositories import S3Repository
-from src.utils.exceptions import EmptyFile, UnsupportedFileType
-from src.utils.readers import read_document
+from src.utils.etags import etag_matches, make_etag, not_modified, set_etag
+from src.utils.exceptions import EmptyFile, UnreadableFile, UnsupportedFileType
+from src.utils.lifecycle import ingestion_queue, ingestions
+from src.utils.metrics import get_file_type, observe_stage
+from src.utils.rate_limits import enforce_rate_limits
+from src.utils.readers import detect_content_type, make_preview, read_document
 from src.utils.requests import (
     send_add_document_request_to_graph_kb_service,
     send_add_document_request_to_vector_kb_service,
@@ -31,25 +41,28 @@ from src.utils.requests import (
 )
 from src.vaults.schemas import (
     AddDocumentRequestToKBService,
+    BulkIngestSummary,
+    CloneVaultRequest,
     CreateRequestToKBService,
     CreateVaultRequest,
     DeleteDocumentRequestToKBService,
+    DocumentIngestEvent,
+    DocumentIngestStatus,
     DocumentResponse,
+    DocumentSyncStatus,
     DocumentText,
     DropRequestToKBService,
+    VaultChangesResponse,
+    VaultCreationResponse,
+    VaultCreationStatus,
     VaultPreviewResponse,
     VaultResponse,
     VaultType,
 )
 
 
-async def encrypt_data(data, password):
-    # Generate a random salt and initialization vector (IV)
-    salt = get_random_bytes(16)
-    iv = get_random_bytes(16)
-
-    # Derive a key from the password
-    key = PBKDF2(
+def derive_key(password, salt):
+    return PBKDF2(
         password,
         salt,
         dkLen=32,
@@ -57,6 +70,15 @@ async def encrypt_data(data, password):
         prf=lambda p, s: HMAC.new(p, s, SHA256).digest(),
     )
 
+
+async def encrypt_data(data, password):
+    # Generate a random salt and initialization vector (IV)
+    salt = get_random_bytes(16)
+    iv = get_random_bytes(16)
+
+    # Derive a key from the password
+    key = derive_key(password, salt)
+
     # Create cipher object and encrypt the data
     cipher = AES.new(key, AES.MODE_CBC, iv)
     ct_bytes = cipher.encrypt(pad(data, AES.block_size))
@@ -68,7 +90,8 @@ async def encrypt_data(data, password):
 
 
 async def add_vault(
-    create_vault_request: CreateVaultRequest, vault_repository: VaultRepository
+    create_vault_request: CreateVaultRequest,
+    creation_repository: VaultCreationRepository,
 ) -> Vault:
     id = uuid.uuid4()  # Generate random unique identifier
 
@@ -79,23 +102,77 @@ async def add_vault(
         user_id=create_vault_request.user_id,
     )
 
-    await vault_repository.add(vault)
+    # The vault is written with the record of its creation progress
+    await creation_repository.add(
+        VaultCreation(vault=vault, status=VaultCreationStatus.STORING)
+    )
 
     return vault
 
 
+async def abort_multipart_uploads(uploads: List[tuple[UUID, str]]) -> None:
+    s3_repository = S3Repository()
+
+    for document_id, s3_upload_id in uploads:
+        try:
+            await s3_repository.abort_multipart_upload(document_id, s3_upload_id)
+        except Exception as e:
+            # E.g. completed meanwhile, its object is deleted with the documents
+            logging.error(f"Aborting multipart upload {s3_upload_id} failed: {e}")
+
+
+async def abort_vault_creation(vault: Vault, vault_repository: VaultRepository) -> None:
+    # Stored rows are the record of the objects uploaded, or about to be uploaded
+    documents = await vault_repository.get_vault_documents(vault.id)
+    unfinished_uploads = await vault_repository.delete(vault.id)
+    await S3Repository().delete_many([str(document.id) for document in documents])
+    await abort_multipart_uploads(unfinished_uploads)
+
+
+async def sync_knowledge_base(
+    vault: Vault,
+    documents: List[Document],
+    creation_repository: VaultCreationRepository,
+) -> None:
+    try:
+        await create_knowledge_base(
+            vault_id=vault.id, documents=documents, vault_type=vault.type
+        )
+    except Exception as e:
+        logging.error(e)
+        # Documents stay stored, /retry_vault_creation resumes from here
+        await creation_repository.set_status(
+            vault.id, VaultCreationStatus.SYNC_FAILED, error=str(e), kb_attempt=True
+        )
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": f"Error uploading documents to {vault.type} knowledge base",
+                "vault_id": str(vault.id),
+            },
+        )
+
+    await creation_repository.set_status(
+        vault.id, VaultCreationStatus.COMPLETED, kb_attempt=True
+    )
+
+
 async def handle_document(
     file: UploadFile,
     vault_id: UUID,
     document_repository: DocumentRepository,
     s3_repository: S3Repository,
+    vault_type: VaultType | None = None,
 ) -> Document:
     id = uuid.uuid4()
+    content_type = await detect_content_type(file)
+    file_type = get_file_type(content_type)
 
     content = await file.read()
     file.file.seek(0)
 
-    text = await read_document(file)
+    with observe_stage("parse", file_type, vault_type):
+        text = await read_document(file, content_type)
 
     if text == "":
         raise EmptyFile()
@@ -104,21 +181,26 @@ async def handle_document(
         id=id,
         name=file.filename,
         text=text,
+        preview=make_preview(text),
         vault_id=vault_id,
     )
 
-    await document_repository.add(document)
+    with observe_stage("db_add", file_type, vault_type):
+        await document_repository.add(document)
 
-    encrypted_content = await encrypt_data(
-        content, password=settings.encryption_password
-    )
-    await s3_repository.put(encrypted_content, id)
+    with observe_stage("encrypt", file_type, vault_type):
+        encrypted_content = await encrypt_data(
+            content, password=settings.encryption_password
+        )
+
+    with observe_stage("s3_put", file_type, vault_type):
+        await s3_repository.put(encrypted_content, id)
 
     return document
 
 
-async def drop_knowledge_base_background(vault_id: UUID, vault_type: VaultType) -> None:
-    delete_request_body = jsonable_encoder(DropRequestToKBService(vault_id=vault_id))
+async def drop_knowledge_base(vault_id: UUID, vault_type: VaultType) -> None:
+    delete_request_body = DropRequestToKBService(vault_id=vault_id)
 
     if vault_type == VaultType.GRAPH:
         await send_drop_request_to_graph_kb_service(body=delete_request_body)
@@ -126,11 +208,11 @@ async def drop_knowledge_base_background(vault_id: UUID, vault_type: VaultType)
         await send_drop_request_to_vector_kb_service(body=delete_request_body)
 
 
-async def delete_document_background(
+async def delete_document_from_knowledge_base(
     vault_id: UUID, vault_type: VaultType, document_id: UUID
 ) -> None:
-    delete_request_body = jsonable_encoder(
-        DeleteDocumentRequestToKBService(vault_id=vault_id, document_id=document_id)
+    delete_request_body = DeleteDocumentRequestToKBService(
+        vault_id=vault_id, document_id=document_id
     )
 
     if vault_type == VaultType.GRAPH:
@@ -141,59 +223,117 @@ async def delete_document_background(
         )
 
 
+async def drop_knowledge_base_background(vault_id: UUID, vault_type: VaultType) -> None:
+    try:
+        await drop_knowledge_base(vault_id, vault_type)
+    except Exception as e:
+        logging.error(e)
+        # Retried by the reconciliation job
+        await KnowledgeBaseDeletionRepository().add(
+            KnowledgeBaseDeletion(vault_id=vault_id, vault_type=vault_type)
+        )
+
+
+async def delete_document_background(
+    vault_id: UUID, vault_type: VaultType, document_id: UUID
+) -> None:
+    try:
+        await delete_document_from_knowledge_base(vault_id, vault_type, document_id)
+    except Exception as e:
+        logging.error(e)
+        # Retried by the reconciliation job
+        await KnowledgeBaseDeletionRepository().add(
+            KnowledgeBaseDeletion(
+                vault_id=vault_id, vault_type=vault_type, document_id=document_id
+            )
+        )
+
+
 async def create_knowledge_base(
     vault_id: UUID, documents: List[Document], vault_type: VaultType
 ) -> None:
-    # Make a create request to KB service
-    upload_request_body = jsonable_encoder(
-        CreateRequestToKBService(
-            vault_id=vault_id,
-            documents=[
-                DocumentText(document_id=doc.id, document_name=doc.name, text=doc.text)
-                for doc in documents
-            ],
-        )
+    # Make a create request to KB service, serialized once when it is sent
+    upload_request_body = CreateRequestToKBService(
+        vault_id=vault_id,
+        documents=[
+            DocumentText(document_id=doc.id, document_name=doc.name, text=doc.text)
+            for doc in documents
+        ],
     )
 
-    if vault_type == VaultType.GRAPH:
-        await send_create_request_to_graph_kb_service(upload_request_body)
-    else:
-        await send_create_request_to_vector_kb_service(upload_request_body)
+    # Results only apply to documents no other sync has settled meanwhile
+    versions = {doc.id: doc.sync_version for doc in documents}
+    try:
+        with observe_stage("kb_create", vault_type=vault_type):
+            if vault_type == VaultType.GRAPH:
+                await send_create_request_to_graph_kb_service(upload_request_body)
+            else:
+                await send_create_request_to_vector_kb_service(upload_request_body)
+    except Exception as e:
+        await DocumentRepository().set_sync_status(
+            versions, DocumentSyncStatus.FAILED, error=str(e)
+        )
+        raise
 
+    await DocumentRepository().set_sync_status(versions, DocumentSyncStatus.SYNCED)
 
-async def add_document_to_knowledge_base(vault_id: UUID, document: Document) -> None:
-    # Make an add request to KB service
-    upload_request_body = jsonable_encoder(
-        AddDocumentRequestToKBService(
-            vault_id=vault_id,
-            document=DocumentText(
-                document_id=document.id, document_name=document.name, text=document.text
-            ),
-        )
+
+async def add_document_to_knowledge_base(
+    vault_id: UUID, document: Document, vault_type: VaultType | None = None
+) -> None:
+    # Make an add request to KB service, serialized once when it is sent
+    upload_request_body = AddDocumentRequestToKBService(
+        vault_id=vault_id,
+        document=DocumentText(
+            document_id=document.id, document_name=document.name, text=document.text
+        ),
     )
 
-    vault_type = (await VaultRepository().get(vault_id)).type
+    if vault_type is None:
+        vault_type = (await VaultRepository().get(vault_id)).type
 
-    if vault_type == VaultType.GRAPH:
-        await send_add_document_request_to_graph_kb_service(upload_request_body)
-    else:
-        await send_add_document_request_to_vector_kb_service(upload_request_body)
+    versions = {document.id: document.sync_version}
+    try:
+        with observe_stage("kb_add", vault_type=vault_type):
+            if vault_type == VaultType.GRAPH:
+                await send_add_document_request_to_graph_kb_service(upload_request_body)
+            else:
+                await send_add_document_request_to_vector_kb_service(
+                    upload_request_body
+                )
+    except Exception as e:
+        await DocumentRepository().set_sync_status(
+            versions, DocumentSyncStatus.FAILED, error=str(e)
+        )
+        raise
 
+    await DocumentRepository().set_sync_status(versions, DocumentSyncStatus.SYNCED)
 
+
+@ingestions.tracked
 async def create_vault(
-    create_vault_request: CreateVaultRequest, files: List[UploadFile]
-) -> VaultResponse:
+    create_vault_request: CreateVaultRequest,
+    files: List[UploadFile],
+    only_changes: bool = False,
+) -> VaultResponse | VaultChangesResponse:
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
 
+    await enforce_rate_limits(
+        create_vault_request.user_id, sum(file.size or 0 for file in files)
+    )
+
     logging.info(f"Files received: {[f.filename for f in files]}")
 
     vault_repository = VaultRepository()
-    vault = await add_vault(create_vault_request, vault_repository)
+    creation_repository = VaultCreationRepository()
+    vault = await add_vault(create_vault_request, creation_repository)
 
     documents = await asyncio.gather(
         *[
-            handle_document(file, vault.id, DocumentRepository(), S3Repository())
+            handle_document(
+                file, vault.id, DocumentRepository(), S3Repository(), vault.type
+            )
             for file in files
         ],
         return_exceptions=True,
@@ -203,32 +343,44 @@ async def create_vault(
         if isinstance(result, BaseException):
             logging.exception("Task exception", exc_info=result)
 
-    # On any UnsupportedFileType, delete the entire vault and raise an HTTPException
+    # On any file that cannot be read, delete the entire vault and raise a 406
     for result in documents:
-        if isinstance(result, UnsupportedFileType):
-            await vault_repository.delete(vault.id)
+        if isinstance(result, (UnsupportedFileType, UnreadableFile)):
+            await abort_vault_creation(vault, vault_repository)
             raise HTTPException(status_code=406, detail=result.message)
 
     if all(isinstance(result, EmptyFile) for result in documents):
-        await vault_repository.delete(vault.id)
+        await abort_vault_creation(vault, vault_repository)
         raise HTTPException(status_code=406, detail=result.message)
 
-    try:
-        await create_knowledge_base(
-            vault_id=vault.id,
+    # Database or S3 failures leave the batch incomplete, undo what was stored
+    if any(
+        isinstance(result, BaseException) and not isinstance(result, EmptyFile)
+        for result in documents
+    ):
+        await abort_vault_creation(vault, vault_repository)
+        raise HTTPException(status_code=500, detail="Error storing documents")
+
+    created_documents = [
+        document for document in documents if isinstance(document, Document)
+    ]
+
+    await creation_repository.set_status(vault.id, VaultCreationStatus.SYNCING)
+    await sync_knowledge_base(vault, created_documents, creation_repository)
+
+    if only_changes:
+        # The vault is new, so the created documents are all of its documents
+        return VaultChangesResponse(
+            id=vault.id,
+            name=vault.name,
+            type=vault.type,
+            created_at=vault.created_at,
+            user_id=vault.user_id,
             documents=[
-                document
-                for document in documents
-                if not (isinstance(document, EmptyFile))
+                DocumentResponse.model_validate(document)
+                for document in created_documents
             ],
-            vault_type=vault.type,
-        )
-    except Exception as e:
-        logging.error(e)
-        await vault_repository.delete(vault.id)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error uploading documents to {vault.type} knowledge base",
+            document_count=len(created_documents),
         )
 
     vault_response = VaultResponse(
@@ -246,23 +398,128 @@ async def create_vault(
     return vault_response
 
 
+@ingestions.tracked
+async def retry_vault_creation(
+    vault_id: UUID, vault_repository: VaultRepository
+) -> VaultResponse:
+    vault = await vault_repository.get(vault_id)
+    await enforce_rate_limits(vault.user_id)
+
+    creation_repository = VaultCreationRepository()
+
+    # Claimed atomically, a concurrent retry or a running creation gets a conflict
+    if not await creation_repository.claim_retry(
+        vault_id, stale_after=settings.vault_creation_stale_after
+    ):
+        creation = await creation_repository.get(vault_id)
+        status = creation.status if creation else VaultCreationStatus.COMPLETED
+        raise HTTPException(status_code=409, detail=f"Vault creation is {status}")
+
+    # Texts were stored by the first attempt, nothing is parsed or uploaded again
+    documents = await vault_repository.get_vault_documents(vault_id, with_text=True)
+    logging.info(f"Retrying knowledge base creation for vault {vault_id}")
+
+    await sync_knowledge_base(vault, documents, creation_repository)
+
+    return VaultResponse(
+        id=vault.id,
+        name=vault.name,
+        type=vault.type,
+        created_at=vault.created_at,
+        user_id=vault.user_id,
+        documents=[DocumentResponse.model_validate(document) for document in documents],
+    )
+
+
+@ingestions.tracked
+async def clone_vault(
+    clone_vault_request: CloneVaultRequest, vault_repository: VaultRepository
+) -> VaultResponse:
+    source = await vault_repository.get(clone_vault_request.vault_id)
+    await enforce_rate_limits(source.user_id)
+
+    vault = Vault(
+        id=uuid.uuid4(),
+        name=clone_vault_request.vault_name or source.name,
+        type=clone_vault_request.vault_type or source.type,
+        user_id=source.user_id,
+    )
+
+    # Rows are copied by the database, and tracked like any vault creation
+    creation_repository = VaultCreationRepository()
+    source_document_ids = await vault_repository.clone(
+        VaultCreation(vault=vault, status=VaultCreationStatus.STORING), source.id
+    )
+    logging.info(f"Cloning {len(source_document_ids)} documents of vault {source.id}")
+
+    s3_repository = S3Repository()
+    semaphore = asyncio.Semaphore(max(settings.clone_copy_concurrency, 1))
+
+    async def copy_object(document_id: UUID) -> None:
+        async with semaphore:
+            await s3_repository.copy(
+                document_id, clone_document_id(document_id, vault.id)
+            )
+
+    try:
+        await asyncio.gather(*[copy_object(id) for id in source_document_ids])
+    except Exception as e:
+        logging.exception("Task exception", exc_info=e)
+        await abort_vault_creation(vault, vault_repository)
+        raise HTTPException(status_code=500, detail="Error copying documents")
+
+    await creation_repository.set_status(vault.id, VaultCreationStatus.SYNCING)
+    documents = await vault_repository.get_vault_documents(vault.id, with_text=True)
+    await sync_knowledge_base(vault, documents, creation_repository)
+
+    return VaultResponse(
+        id=vault.id,
+        name=vault.name,
+        type=vault.type,
+        created_at=vault.created_at,
+        user_id=vault.user_id,
+        documents=[DocumentResponse.model_validate(document) for document in documents],
+    )
+
+
+async def get_vault_creation(vault_id: UUID) -> VaultCreationResponse:
+    creation = await VaultCreationRepository().get(vault_id)
+    if not creation:
+        raise HTTPException(status_code=404, detail="Vault creation not found")
+
+    return VaultCreationResponse.model_validate(creation)
+
+
+@ingestions.tracked
 async def add_document(
-    vault_id: UUID, file: UploadFile, vault_repository: VaultRepository
-) -> None:
+    vault_id: UUID,
+    file: UploadFile,
+    vault_repository: VaultRepository,
+    only_changes: bool = False,
+) -> VaultResponse | VaultChangesResponse:
     if not file:
         raise HTTPException(status_code=400, detail="File not provided")
 
+    vault = await vault_repository.get(vault_id)
+    await enforce_rate_limits(vault.user_id, file.size or 0)
+
     logging.info(f"File received: {file.filename}")
 
     try:
-        document = await handle_document(file, vault_id, DocumentRepository(), S3Repository())
+        document = await handle_document(
+            file, vault_id, DocumentRepository(), S3Repository(), vault.type
+        )
     except UnsupportedFileType as e:
         raise HTTPException(status_code=406, detail=e.message)
     except EmptyFile as e:
         raise HTTPException(status_code=406, detail=e.message)
+    except UnreadableFile as e:
+        raise HTTPException(status_code=406, detail=e.message)
 
     try:
-        await add_document_to_knowledge_base(vault_id=vault_id, document=document)
+        await add_document_to_knowledge_base(
+            vault_id=vault_id, document=document, vault_type=vault.type
+        )
     except Exception as e:
         logging.error(e)
         raise HTTPException(
@@ -270,7 +527,17 @@ async def add_document(
             detail=f"Error adding documents to knowledge base {vault_id}",
         )
 
-    vault = await vault_repository.get(vault_id)
+    if only_changes:
+        return VaultChangesResponse(
+            id=vault.id,
+            name=vault.name,
+            type=vault.type,
+            created_at=vault.created_at,
+            user_id=vault.user_id,
+            documents=[DocumentResponse.model_validate(document)],
+            document_count=await vault_repository.count_vault_documents(vault.id),
+        )
+
     vault_response = VaultResponse(
         id=vault.id,
         name=vault.name,
@@ -286,15 +553,151 @@ async def add_document(
     return vault_response
 
 
+SPOOL_MAX_SIZE = 1024 * 1024  # Larger files roll over to disk, as in Starlette
+SPOOL_CHUNK_SIZE = 64 * 1024
+
+
+async def spool_upload(file: UploadFile) -> UploadFile:
+    """Copy of an upload that outlives the request.
+
+    FastAPI closes the request's uploads once the route returns, before a
+    streaming response is sent, so files read by the stream are copied first.
+    """
+    buffer = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    while chunk := await file.read(SPOOL_CHUNK_SIZE):
+        buffer.write(chunk)
+    buffer.seek(0)
+
+    return UploadFile(
+        buffer, size=file.size, filename=file.filename, headers=file.headers
+    )
+
+
+@ingestions.tracked
+async def add_documents(vault: Vault, files: List[UploadFile]) -> AsyncIterator[str]:
+    """Ingest files into an existing vault, yielding one NDJSON event per file.
+
+    Files flow through two stages connected by a bounded queue: parse/encrypt/store
+    workers feed knowledge base indexing workers, so a slow stage applies
+    backpressure instead of buffering the whole batch. The files must be owned by
+    the stream, see spool_upload, and are closed once it ends.
+    """
+    logging.info(f"Files received: {[f.filename for f in files]}")
+
+    concurrency = max(settings.bulk_ingest_concurrency, 1)
+    ingest_queue: asyncio.Queue = asyncio.Queue()
+    index_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    events: asyncio.Queue = asyncio.Queue()
+
+    for file in files:
+        ingest_queue.put_nowait(file)
+    ingestion_queue.add(len(files))
+
+    async def ingest_worker() -> None:
+        while not ingest_queue.empty():
+            file = ingest_queue.get_nowait()
+            ingestion_queue.remove()
+            try:
+                document = await handle_document(
+                    file, vault.id, DocumentRepository(), S3Repository(), vault.type
+                )
+            except (UnsupportedFileType, UnreadableFile, EmptyFile) as e:
+                await events.put(
+                    DocumentIngestEvent(
+                        filename=file.filename,
+                        status=DocumentIngestStatus.REJECTED,
+                        detail=e.message,
+                    )
+                )
+            except Exception as e:
+                logging.exception("Task exception", exc_info=e)
+                await events.put(
+                    DocumentIngestEvent(
+                        filename=file.filename,
+                        status=DocumentIngestStatus.FAILED,
+                        detail="Error storing document",
+                    )
+                )
+            else:
+                await index_queue.put((file.filename, document))
+
+    async def index_worker() -> None:
+        while (item := await index_queue.get()) is not None:
+            filename, document = item
+            try:
+                await add_document_to_knowledge_base(
+                    vault_id=vault.id, document=document, vault_type=vault.type
+                )
+            except Exception as e:
+                logging.error(e)
+                event = DocumentIngestEvent(
+                    filename=filename,
+                    status=DocumentIngestStatus.FAILED,
+                    document_id=document.id,
+                    detail=f"Error adding document to {vault.type} knowledge base",
+                )
+            else:
+                event = DocumentIngestEvent(
+                    filename=filename,
+                    status=DocumentIngestStatus.ADDED,
+                    document_id=document.id,
+                )
+            await events.put(event)
+
+    async def run_pipeline() -> None:
+        indexers = [asyncio.create_task(index_worker()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*[ingest_worker() for _ in range(concurrency)])
+            for _ in indexers:
+                await index_queue.put(None)
+            await asyncio.gather(*indexers)
+        finally:
+            for indexer in indexers:
+                indexer.cancel()
+            events.put_nowait(None)
+
+    pipeline = asyncio.create_task(run_pipeline())
+    counts = {status: 0 for status in DocumentIngestStatus}
+
+    try:
+        while (event := await events.get()) is not None:
+            counts[event.status] += 1
+            yield event.model_dump_json() + "\n"
+
+        await pipeline
+    finally:
+        pipeline.cancel()
+        # Files never picked up, e.g. when the client disconnected
+        while not ingest_queue.empty():
+            ingest_queue.get_nowait()
+            ingestion_queue.remove()
+        for file in files:
+            await file.close()
+
+    summary = BulkIngestSummary(
+        vault_id=vault.id,
+        added=counts[DocumentIngestStatus.ADDED],
+        rejected=counts[DocumentIngestStatus.REJECTED],
+        failed=counts[DocumentIngestStatus.FAILED],
+    )
+    yield summary.model_dump_json() + "\n"
+
+
 async def delete_vault(
     vault_id: UUID,
     vault_repository: VaultRepository,
     background_tasks: BackgroundTasks,
 ) -> None:
     vault = await vault_repository.get(vault_id)
-    await vault_repository.delete(vault_id)
+    documents = await vault_repository.get_vault_documents(vault_id)
+    unfinished_uploads = await vault_repository.delete(vault_id)
 
     background_tasks.add_task(drop_knowledge_base_background, vault_id, vault.type)
+    background_tasks.add_task(
+        S3Repository().delete_many, [str(document.id) for document in documents]
+    )
+    # Parts of unfinished multipart uploads are stored, and billed, until aborted
+    background_tasks.add_task(abort_multipart_uploads, unfinished_uploads)
 
 
 async def delete_document(
@@ -316,25 +719,51 @@ async def delete_document(
 async def get_vault_documents(
     vault_id: UUID,
     vault_repository: VaultRepository,
-) -> List[DocumentResponse]:
+    response: Response,
+    if_none_match: str | None = None,
+) -> List[DocumentResponse] | Response:
+    vault = await vault_repository.get(vault_id)
+
+    etag = make_etag(vault.id, vault.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     documents = await vault_repository.get_vault_documents(vault_id)
 
     return [DocumentResponse.model_validate(document) for document in documents]
 
 
-async def get_users_vaults(user_id: UUID) -> List[VaultPreviewResponse]:
+async def get_users_vaults(
+    user_id: UUID, response: Response, if_none_match: str | None = None
+) -> List[VaultPreviewResponse] | Response:
     vault_repository = VaultRepository()
 
     vaults = await vault_repository.get_users_vaults(user_id)
 
+    # Vaults created, deleted or changed all alter the list of versions
+    versions = sorted(f"{vault.id}.{vault.version}" for vault in vaults)
+    etag = make_etag(user_id, *versions)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     return [VaultPreviewResponse.model_validate(vault) for vault in vaults]
 
 
 async def get_vault_by_id(
-    vault_id: UUID, vault_repository: VaultRepository
-) -> VaultResponse:
+    vault_id: UUID,
+    vault_repository: VaultRepository,
+    response: Response,
+    if_none_match: str | None = None,
+) -> VaultResponse | Response:
     vault = await vault_repository.get(vault_id)
 
+    etag = make_etag(vault.id, vault.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     vault_response = VaultResponse(
         id=vault.id,
         name=vault.name,
@@ -0,0 +1,7 @@
+from uvicorn.workers import UvicornWorker
+
+
+class VaultsUvicornWorker(UvicornWorker):
+    """Gunicorn worker running uvicorn on uvloop with the httptools parser."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
@@ -0,0 +1,22 @@
+"""Shared setup for the tests, which run without Postgres, S3 or the KB services.
+
+Run from vaults_service: pytest tests
+"""
+import os
+
+# Settings are read at import time
+for name, value in {
+    "DB_DIALECT": "postgresql",
+    "DB_ASYNC_DRIVER": "asyncpg",
+    "DB_HOST": "localhost",
+    "DB_NAME": "vaults",
+    "DB_USER": "vaults",
+    "DB_PASSWORD": "vaults",
+    "S3_ACCESS_KEY": "minioadmin",
+    "S3_SECRET_KEY": "minioadmin",
+    "S3_ENDPOINT_URL": "http://localhost:9000",
+    "S3_BUCKET_NAME": "vaults",
+    "ENCRYPTION_PASSWORD": "test",
+    "RATE_LIMIT_ENABLED": "false",
+}.items():
+    os.environ.setdefault(name, value)
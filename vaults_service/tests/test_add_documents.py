@@ -0,0 +1,61 @@
+import json
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+
+
+class FakeVaultRepository:
+    vault = SimpleNamespace(id=uuid.uuid4(), type="graph", user_id=uuid.uuid4())
+
+    async def get(self, id):
+        return self.vault
+
+
+class FakeDocumentRepository:
+    async def add(self, document):
+        pass
+
+
+class FakeS3Repository:
+    async def put(self, content, name):
+        pass
+
+
+@pytest.fixture
+def client():
+    with (
+        mock.patch("src.vaults.dependencies.VaultRepository", FakeVaultRepository),
+        mock.patch("src.vaults.utils.DocumentRepository", FakeDocumentRepository),
+        mock.patch("src.vaults.utils.S3Repository", FakeS3Repository),
+        mock.patch("src.vaults.utils.add_document_to_knowledge_base") as add_to_kb,
+    ):
+        add_to_kb.return_value = None
+        # Without the context manager the lifespan, and its connections, is skipped
+        yield TestClient(app)
+
+
+def test_add_documents_reads_files_after_the_route_returns(client):
+    response = client.post(
+        "/add_documents",
+        data={"vault_id": str(FakeVaultRepository.vault.id)},
+        files=[
+            ("files", ("first.txt", b"First document", "text/plain")),
+            ("files", ("second.txt", b"Second document", "text/plain")),
+            ("files", ("empty.txt", b"", "text/plain")),
+        ],
+    )
+
+    assert response.status_code == 200
+    *events, summary = [json.loads(line) for line in response.text.splitlines()]
+    statuses = {event["filename"]: event["status"] for event in events}
+    assert statuses == {
+        "first.txt": "added",
+        "second.txt": "added",
+        "empty.txt": "rejected",
+    }
+    assert (summary["added"], summary["rejected"], summary["failed"]) == (2, 1, 0)
@@ -0,0 +1,112 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from src.utils import requests
+from src.utils.exceptions import KBServiceUnavailable
+from src.utils.requests import CircuitBreaker, KBServiceClient
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    clock = Clock()
+    with mock.patch.object(requests.time, "monotonic", clock):
+        yield clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("graph", failure_threshold=3, reset_timeout=30)
+
+
+def open_circuit(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_circuit_opens_after_consecutive_failures(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert not breaker.is_open
+
+
+def test_single_trial_call_is_let_through_after_the_reset_timeout(breaker, clock):
+    open_circuit(breaker)
+
+    clock.now += 29
+    assert not breaker.allow()
+
+    clock.now += 1
+    assert breaker.allow()
+    # Half open, other calls fail fast while the trial is in flight
+    assert not breaker.allow()
+
+
+def test_successful_trial_closes_the_circuit(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 30
+    breaker.allow()
+
+    breaker.record_success()
+
+    assert not breaker.is_open
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_trial_opens_the_circuit_for_another_timeout(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 30
+    breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.is_open
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_released_trial_lets_the_next_call_try(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 30
+    breaker.allow()
+
+    breaker.release_trial()
+
+    assert breaker.is_open
+    assert breaker.allow()
+
+
+def test_open_circuit_fails_calls_without_a_request(clock):
+    client = KBServiceClient("graph")
+    open_circuit(client.breaker)
+
+    with mock.patch.object(requests, "get_http_session") as get_http_session:
+        with pytest.raises(KBServiceUnavailable):
+            asyncio.run(client.request("POST", "create", mock.Mock()))
+
+    get_http_session.assert_not_called()
@@ -0,0 +1,118 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from fastapi.exceptions import HTTPException
+
+from src.database.models import Document
+from src.database.postgres_repositories import clone_document_id
+from src.vaults import utils
+from src.vaults.schemas import CloneVaultRequest, VaultCreationStatus, VaultType
+
+SOURCE = SimpleNamespace(
+    id=uuid.uuid4(), name="source", type="graph", user_id=uuid.uuid4()
+)
+SOURCE_DOCUMENT_IDS = [uuid.uuid4() for _ in range(3)]
+
+
+class FakeVaultRepository:
+    def __init__(self):
+        self.creation = None
+
+    async def get(self, id):
+        return SOURCE
+
+    async def clone(self, creation, source_id):
+        assert source_id == SOURCE.id
+        creation.vault.created_at = datetime.now(timezone.utc)
+        self.creation = creation
+        return SOURCE_DOCUMENT_IDS
+
+    async def get_vault_documents(self, vault_id, with_text=False):
+        return [
+            Document(
+                id=clone_document_id(id, vault_id),
+                name="document.txt",
+                text="text",
+                preview="text",
+                vault_id=vault_id,
+            )
+            for id in SOURCE_DOCUMENT_IDS
+        ]
+
+
+@pytest.fixture
+def s3_repository():
+    s3_repository = mock.AsyncMock()
+    with (
+        mock.patch.object(utils, "S3Repository", return_value=s3_repository),
+        mock.patch.object(
+            utils, "VaultCreationRepository", return_value=mock.AsyncMock()
+        ),
+    ):
+        yield s3_repository
+
+
+def clone(request: CloneVaultRequest, vault_repository):
+    return asyncio.run(utils.clone_vault(request, vault_repository))
+
+
+def test_clone_document_id_is_stable_and_distinct_per_vault():
+    document_id, vault_id = uuid.uuid4(), uuid.uuid4()
+
+    assert clone_document_id(document_id, vault_id) == clone_document_id(
+        document_id, vault_id
+    )
+    assert clone_document_id(document_id, vault_id) != clone_document_id(
+        document_id, uuid.uuid4()
+    )
+
+
+def test_clone_copies_every_object_and_syncs_the_copies(s3_repository):
+    vault_repository = FakeVaultRepository()
+
+    with mock.patch.object(utils, "sync_knowledge_base") as sync:
+        response = clone(CloneVaultRequest(vault_id=SOURCE.id), vault_repository)
+
+    vault = vault_repository.creation.vault
+    assert vault_repository.creation.status == VaultCreationStatus.STORING
+    assert (vault.name, vault.type) == (SOURCE.name, SOURCE.type)
+    assert vault.user_id == SOURCE.user_id
+    assert sorted(call.args for call in s3_repository.copy.await_args_list) == sorted(
+        (id, clone_document_id(id, vault.id)) for id in SOURCE_DOCUMENT_IDS
+    )
+    sync.assert_awaited_once()
+    assert response.id == vault.id
+    assert {document.id for document in response.documents} == {
+        clone_document_id(id, vault.id) for id in SOURCE_DOCUMENT_IDS
+    }
+
+
+def test_clone_takes_a_new_name_and_type(s3_repository):
+    vault_repository = FakeVaultRepository()
+    request = CloneVaultRequest(
+        vault_id=SOURCE.id, vault_name="copy", vault_type=VaultType.VECTOR
+    )
+
+    with mock.patch.object(utils, "sync_knowledge_base"):
+        response = clone(request, vault_repository)
+
+    assert (response.name, response.type) == ("copy", VaultType.VECTOR)
+
+
+def test_failed_copy_aborts_the_clone(s3_repository):
+    s3_repository.copy.side_effect = ConnectionError("S3 unavailable")
+
+    with (
+        mock.patch.object(utils, "abort_vault_creation") as abort,
+        mock.patch.object(utils, "sync_knowledge_base") as sync,
+    ):
+        with pytest.raises(HTTPException) as error:
+            clone(CloneVaultRequest(vault_id=SOURCE.id), FakeVaultRepository())
+
+    assert error.value.status_code == 500
+    abort.assert_awaited_once()
+    sync.assert_not_awaited()
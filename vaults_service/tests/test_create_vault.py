@@ -0,0 +1,70 @@
+import json
+import uuid
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+
+
+class FakeVaultCreationRepository:
+    async def add(self, creation):
+        pass
+
+
+class FakeDocumentRepository:
+    fail = False
+
+    async def add(self, document):
+        if self.fail:
+            raise ConnectionError("Database unavailable")
+
+
+class FakeS3Repository:
+    async def put(self, content, name):
+        pass
+
+
+@pytest.fixture
+def abort():
+    with (
+        mock.patch("src.vaults.utils.VaultRepository"),
+        mock.patch(
+            "src.vaults.utils.VaultCreationRepository", FakeVaultCreationRepository
+        ),
+        mock.patch("src.vaults.utils.DocumentRepository", FakeDocumentRepository),
+        mock.patch("src.vaults.utils.S3Repository", FakeS3Repository),
+        mock.patch("src.vaults.utils.abort_vault_creation") as abort,
+    ):
+        yield abort
+
+
+def create_vault(*files):
+    request = {"user_id": str(uuid.uuid4()), "vault_name": "v", "vault_type": "graph"}
+    return TestClient(app).post(
+        "/create_vault",
+        data={"create_vault_request": json.dumps(request)},
+        files=[("files", file) for file in files],
+    )
+
+
+def test_unreadable_file_is_rejected_as_client_error(abort):
+    response = create_vault(
+        ("good.txt", b"Readable text", "text/plain"),
+        ("cp1251.txt", "Привет".encode("cp1251"), "text/plain"),
+    )
+
+    assert response.status_code == 406
+    assert "cp1251.txt" in response.json()["detail"]
+    abort.assert_awaited_once()
+
+
+def test_storage_failure_aborts_with_server_error(abort, monkeypatch):
+    monkeypatch.setattr(FakeDocumentRepository, "fail", True)
+
+    response = create_vault(("good.txt", b"Readable text", "text/plain"))
+
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Error storing documents"
+    abort.assert_awaited_once()
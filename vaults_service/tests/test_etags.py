@@ -0,0 +1,94 @@
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.utils.etags import etag_matches, make_etag
+
+ETAG = make_etag("vault", 1)
+STRONG_ETAG = ETAG.removeprefix("W/")
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    [
+        pytest.param(ETAG, id="weak"),
+        pytest.param(STRONG_ETAG, id="strong"),
+        pytest.param(f'W/"other", {STRONG_ETAG}', id="list"),
+        pytest.param("*", id="any"),
+        pytest.param(" * ", id="any-padded"),
+    ],
+)
+def test_etag_matches(if_none_match):
+    assert etag_matches(if_none_match, ETAG)
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    [
+        pytest.param(None, id="missing"),
+        pytest.param("", id="empty"),
+        pytest.param(make_etag("vault", 2), id="other-version"),
+        # "*" only stands for any tag on its own
+        pytest.param('W/"other", *', id="any-in-list"),
+    ],
+)
+def test_etag_does_not_match(if_none_match):
+    assert not etag_matches(if_none_match, ETAG)
+
+
+def test_make_etag_is_weak_and_changes_with_the_version():
+    assert ETAG.startswith('W/"')
+    assert make_etag("vault", 1) == ETAG
+    assert make_etag("vault", 2) != ETAG
+
+
+class FakeVaultRepository:
+    vault = SimpleNamespace(id=uuid.uuid4(), version=1)
+    documents = []
+
+    async def get(self, id):
+        return self.vault
+
+    async def get_vault_documents(self, vault_id):
+        return self.documents
+
+
+@pytest.fixture
+def client():
+    with mock.patch("src.vaults.dependencies.VaultRepository", FakeVaultRepository):
+        yield TestClient(app)
+
+
+def get_vault_documents(client, **headers):
+    return client.post(
+        "/get_vault_documents",
+        json={"vault_id": str(FakeVaultRepository.vault.id)},
+        headers=headers,
+    )
+
+
+def test_unchanged_vault_documents_are_not_sent_again(client):
+    response = get_vault_documents(client)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = get_vault_documents(client, **{"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_changed_vault_documents_are_sent_again(client, monkeypatch):
+    etag = get_vault_documents(client).headers["ETag"]
+    vault = SimpleNamespace(id=FakeVaultRepository.vault.id, version=2)
+    monkeypatch.setattr(FakeVaultRepository, "vault", vault)
+
+    response = get_vault_documents(client, **{"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
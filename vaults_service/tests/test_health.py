@@ -0,0 +1,59 @@
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.health import utils
+from src.main import app
+
+
+async def ok():
+    pass
+
+
+async def unreachable():
+    raise ConnectionError("Connection refused")
+
+
+@pytest.fixture
+def dependencies():
+    def patch(**checks):
+        utils._results.clear()
+        return mock.patch.dict(utils.DEPENDENCIES, checks)
+
+    yield patch
+    utils._results.clear()
+
+
+def get_ready():
+    return TestClient(app).get("/health/ready")
+
+
+def test_unreachable_kb_service_does_not_fail_readiness(dependencies):
+    with dependencies(postgres=ok, s3=ok, graph_kb=unreachable, vector_kb=ok):
+        response = get_ready()
+
+    assert response.status_code == 200
+    checks = {check["name"]: check for check in response.json()["checks"]}
+    assert checks["graph_kb"]["ok"] is False
+    assert checks["graph_kb"]["required"] is False
+
+
+def test_unreachable_database_fails_readiness(dependencies):
+    with dependencies(postgres=unreachable, s3=ok, graph_kb=ok, vector_kb=ok):
+        response = get_ready()
+
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["postgres unavailable"]
+
+
+def test_required_dependencies_are_configurable(dependencies, monkeypatch):
+    monkeypatch.setattr(
+        utils.settings, "ready_dependencies", ["postgres", "s3", "graph_kb"]
+    )
+
+    with dependencies(postgres=ok, s3=ok, graph_kb=unreachable, vector_kb=ok):
+        response = get_ready()
+
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["graph_kb unavailable"]
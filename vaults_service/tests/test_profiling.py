@@ -0,0 +1,26 @@
+import threading
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.utils import profiling
+
+
+def test_requested_profile_is_saved_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling.settings, "profiling_enabled", True)
+    monkeypatch.setattr(profiling.settings, "profiling_output_dir", str(tmp_path))
+    threads = []
+    save_report = profiling.save_report
+
+    def save(*args):
+        threads.append(threading.current_thread())
+        save_report(*args)
+
+    with mock.patch.object(profiling, "save_report", save):
+        response = TestClient(app).get("/health/live", headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert [path.suffix for path in tmp_path.iterdir()] == [".html"]
+    # The loop runs in the test client's portal thread, the report in a worker
+    assert threads and threads[0].name.startswith("asyncio_")
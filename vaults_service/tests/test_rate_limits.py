@@ -0,0 +1,82 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from src.utils import rate_limits
+from src.utils.rate_limits import InMemoryRateLimitBackend
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    clock = Clock()
+    with mock.patch.object(rate_limits.time, "monotonic", clock):
+        yield clock
+
+
+def take(backend, key="user", cost=1, rate=1.0, capacity=3) -> float:
+    return asyncio.run(backend.take(key, cost, rate, capacity))
+
+
+def test_burst_is_admitted_then_refilled_at_the_rate(clock):
+    backend = InMemoryRateLimitBackend()
+
+    assert [take(backend) for _ in range(3)] == [0, 0, 0]
+    assert take(backend) == pytest.approx(1.0)
+
+    clock.now += 0.5
+    assert take(backend) == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert take(backend) == 0
+
+
+def test_refill_is_capped_at_the_capacity(clock):
+    backend = InMemoryRateLimitBackend()
+    take(backend, cost=3)
+
+    clock.now += 60
+    assert [take(backend) for _ in range(3)] == [0, 0, 0]
+    assert take(backend) > 0
+
+
+def test_cost_above_capacity_is_admitted_from_a_full_bucket_and_leaves_debt(clock):
+    backend = InMemoryRateLimitBackend()
+
+    assert take(backend, cost=5) == 0
+    # Two tokens in debt, the next request waits for three
+    assert take(backend) == pytest.approx(3.0)
+
+
+def test_buckets_are_bounded_by_evicting_the_least_recently_updated(clock):
+    backend = InMemoryRateLimitBackend()
+    backend.max_buckets = 3
+
+    for key in ("a", "b", "c"):
+        take(backend, key)
+    clock.now += 0.1
+    take(backend, "a")  # "b" is now the least recently updated
+    take(backend, "d")
+
+    assert list(backend.buckets) == ["c", "a", "d"]
+
+
+def test_refilled_buckets_are_pruned_before_active_ones(clock):
+    backend = InMemoryRateLimitBackend()
+    backend.max_buckets = 3
+
+    take(backend, "a", capacity=1)
+    take(backend, "b", cost=3)
+    take(backend, "c", cost=3)
+    clock.now += 1.5  # Only "a" is full again
+    take(backend, "d")
+
+    assert list(backend.buckets) == ["b", "c", "d"]
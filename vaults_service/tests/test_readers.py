@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from src.utils import readers
+from src.utils.exceptions import UnreadableFile
+from src.utils.readers import extract_docx, read_document, read_pdf
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+WORD_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def make_docx(body: str) -> bytes:
+    document = (
+        f'<w:document xmlns:w="{WORD_NAMESPACE}"><w:body>{body}</w:body></w:document>'
+    )
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def make_upload(content: bytes, content_type: str = DOCX) -> UploadFile:
+    return UploadFile(
+        BytesIO(content),
+        size=len(content),
+        filename="document.docx",
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+def paragraph(text: str) -> str:
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def cell(text: str) -> str:
+    return f"<w:tc>{paragraph(text) if text else '<w:p/>'}</w:tc>"
+
+
+def test_extract_docx_reads_table_cells_in_document_order():
+    table = (
+        "<w:tbl>"
+        f"<w:tr>{cell('Name')}{cell('Size')}</w:tr>"
+        f"<w:tr>{cell('report.pdf')}{cell('')}</w:tr>"
+        "</w:tbl>"
+    )
+    body = paragraph("Before") + "<w:p/>" + table + paragraph("After")
+
+    text = extract_docx(BytesIO(make_docx(body)))
+
+    # Empty paragraphs are blank lines, empty cells are skipped
+    assert text == "Before\n\nName\nSize\nreport.pdf\nAfter"
+
+
+def test_extract_docx_reads_breaks_and_tabs():
+    body = "<w:p><w:r><w:t>a</w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t></w:r></w:p>"
+
+    assert extract_docx(BytesIO(make_docx(body))) == "a\tb\nc"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        pytest.param(b"not a zip archive", id="not-zip"),
+        pytest.param(make_docx("<w:p>")[:-30], id="truncated"),
+        pytest.param(make_docx("<w:p><w:r>"), id="malformed-xml"),
+    ],
+)
+def test_corrupt_docx_is_unreadable(content):
+    with pytest.raises(UnreadableFile):
+        asyncio.run(read_document(make_upload(content), DOCX))
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        BrokenProcessPool("A worker died"),
+        OSError(28, "No space left on device"),
+    ],
+)
+def test_server_faults_are_not_blamed_on_the_file(error):
+    reader = mock.AsyncMock(side_effect=error)
+
+    with mock.patch.dict(readers.READERS, {DOCX: reader}):
+        with pytest.raises(type(error)):
+            asyncio.run(read_document(make_upload(make_docx(paragraph("a"))), DOCX))
+
+
+def make_pdf(*texts: str) -> bytes:
+    import fitz
+
+    with fitz.open() as pdf_document:
+        for text in texts:
+            page = pdf_document.new_page()
+            if text:
+                page.insert_text((72, 72), text)
+        return pdf_document.tobytes()
+
+
+def test_read_pdf_extracts_text_pages():
+    text = asyncio.run(read_pdf(make_upload(make_pdf("First", "Second"), PDF)))
+
+    assert text.split() == ["First", "Second"]
+
+
+def test_read_pdf_skips_documents_without_text_layer():
+    assert asyncio.run(read_pdf(make_upload(make_pdf("", ""), PDF))) == ""
+
+
+def test_read_pdf_probes_off_the_event_loop():
+    threads = []
+    count_pdf_text_pages = readers.count_pdf_text_pages
+
+    def probe(file_content):
+        threads.append(threading.current_thread())
+        return count_pdf_text_pages(file_content)
+
+    with mock.patch.object(readers, "count_pdf_text_pages", probe):
+        asyncio.run(read_pdf(make_upload(make_pdf("Text"), PDF)))
+
+    assert threads and threads[0] is not threading.main_thread()
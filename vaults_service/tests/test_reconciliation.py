@@ -0,0 +1,161 @@
+import asyncio
+import itertools
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from src.database.models import Document, Vault
+from src.vaults import reconciliation
+
+VAULT = Vault(id=uuid.uuid4(), name="vault", type="graph", user_id=uuid.uuid4())
+STALE = datetime.now(timezone.utc) - timedelta(days=1)
+
+
+def make_document(sync_version: int) -> Document:
+    return Document(
+        id=uuid.uuid4(),
+        name="document.txt",
+        text="text",
+        preview="text",
+        vault_id=VAULT.id,
+        sync_version=sync_version,
+    )
+
+
+def get_state(document: Document, status: str = "failed"):
+    return SimpleNamespace(
+        id=document.id,
+        sync_status=status,
+        sync_version=document.sync_version,
+        sync_updated_at=STALE,
+    )
+
+
+@pytest.fixture
+def repositories():
+    with (
+        mock.patch.object(reconciliation, "VaultRepository") as vault_repository,
+        mock.patch.object(reconciliation, "DocumentRepository") as document_repository,
+        mock.patch.object(reconciliation, "VaultCreationRepository") as creations,
+    ):
+        creations.return_value.get = mock.AsyncMock(return_value=None)
+        yield vault_repository.return_value, document_repository.return_value
+
+
+def reconcile(kb_ids):
+    with mock.patch.object(
+        reconciliation, "list_knowledge_base_documents", return_value=kb_ids
+    ):
+        return asyncio.run(reconciliation.reconcile_vault(VAULT))
+
+
+def test_lost_knowledge_base_is_created_with_every_document(repositories):
+    vault_repository, _ = repositories
+    synced, failed = make_document(2), make_document(3)
+    vault_repository.get_sync_states = mock.AsyncMock(
+        return_value=[get_state(synced, "synced"), get_state(failed)]
+    )
+    vault_repository.get_vault_documents = mock.AsyncMock(
+        return_value=[synced, failed]
+    )
+
+    with mock.patch.object(reconciliation, "create_knowledge_base") as create:
+        report = reconcile(set())
+
+    create.assert_awaited_once_with(VAULT.id, [synced, failed], VAULT.type)
+    assert report.resent == 2
+
+
+def test_documents_synced_meanwhile_are_not_resent(repositories):
+    vault_repository, document_repository = repositories
+    missing, changed = make_document(2), make_document(2)
+    vault_repository.get_sync_states = mock.AsyncMock(
+        return_value=[get_state(missing), get_state(changed)]
+    )
+    changed.sync_version = 3  # Settled by a request after the states were read
+    document_repository.get_many = mock.AsyncMock(return_value=[missing, changed])
+
+    with (
+        mock.patch.object(reconciliation, "add_document_to_knowledge_base") as add,
+        mock.patch.object(reconciliation, "delete_document_from_knowledge_base"),
+    ):
+        # The knowledge base holds a deleted document only
+        report = reconcile({uuid.uuid4()})
+
+    add.assert_awaited_once_with(VAULT.id, missing, VAULT.type)
+    assert (report.resent, report.resend_failed) == (1, 0)
+
+
+class FakeDeletionRepository:
+    def __init__(self, *deletions):
+        self.deletions = {deletion.id: deletion for deletion in deletions}
+        self.clock = itertools.count(1)
+
+    async def get_due(self, limit, max_attempts):
+        due = [d for d in self.deletions.values() if d.attempts < max_attempts]
+        due.sort(key=lambda d: (d.attempts, d.last_attempt_at or 0, d.id))
+        return due[:limit]
+
+    async def record_failure(self, id, error):
+        self.deletions[id].attempts += 1
+        self.deletions[id].last_attempt_at = next(self.clock)
+        return self.deletions[id].attempts
+
+    async def delete(self, id):
+        del self.deletions[id]
+
+
+def make_deletion(id: int, document_id=None):
+    return SimpleNamespace(
+        id=id,
+        vault_id=VAULT.id,
+        vault_type=VAULT.type,
+        document_id=document_id,
+        attempts=0,
+        last_attempt_at=None,
+    )
+
+
+def retry_deletions(repository, drop, monkeypatch):
+    monkeypatch.setattr(reconciliation.settings, "reconcile_batch_size", 1)
+    monkeypatch.setattr(reconciliation.settings, "kb_deletion_max_attempts", 2)
+    with (
+        mock.patch.object(
+            reconciliation, "KnowledgeBaseDeletionRepository", lambda: repository
+        ),
+        mock.patch.object(reconciliation, "drop_knowledge_base", drop),
+    ):
+        asyncio.run(reconciliation.retry_knowledge_base_deletions())
+
+
+def test_failing_deletions_do_not_starve_newer_ones(monkeypatch):
+    failing, newer = make_deletion(1), make_deletion(2)
+    repository = FakeDeletionRepository(failing, newer)
+
+    async def drop(vault_id, vault_type):
+        if drop.calls == 0:
+            drop.calls += 1
+            raise ConnectionError("Knowledge base unavailable")
+
+    drop.calls = 0
+    retry_deletions(repository, drop, monkeypatch)  # The oldest fails
+    retry_deletions(repository, drop, monkeypatch)  # The newer one comes next
+
+    assert list(repository.deletions) == [1]
+    assert failing.attempts == 1
+
+
+def test_deletions_are_parked_after_max_attempts(monkeypatch, caplog):
+    deletion = make_deletion(1)
+    repository = FakeDeletionRepository(deletion)
+    drop = mock.AsyncMock(side_effect=ConnectionError("Knowledge base unavailable"))
+
+    for _ in range(3):
+        retry_deletions(repository, drop, monkeypatch)
+
+    assert drop.await_count == 2
+    assert deletion.attempts == 2
+    assert "Parked knowledge base deletion 1 after 2 attempts" in caplog.text
@@ -0,0 +1,51 @@
+import asyncio
+import json
+import uuid
+from unittest import mock
+
+from fastapi.responses import ORJSONResponse
+
+from src.main import app
+from src.utils import requests
+from src.vaults.schemas import CreateRequestToKBService, DocumentText
+
+
+class FakeResponse:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    async def json(self):
+        return {}
+
+
+def test_kb_payload_is_sent_as_the_model_json():
+    body = CreateRequestToKBService(
+        vault_id=uuid.uuid4(),
+        documents=[
+            DocumentText(
+                document_id=uuid.uuid4(),
+                document_name="ß.txt",
+                text='Привет\n"quoted"',
+            )
+        ],
+    )
+    session = mock.Mock()
+    session.request.return_value = FakeResponse()
+
+    with mock.patch.object(requests, "get_http_session", return_value=session):
+        asyncio.run(requests.send_create_request_to_graph_kb_service(body))
+
+    sent = session.request.call_args.kwargs
+    assert sent["data"] == body.model_dump_json().encode()
+    assert sent["headers"]["Content-Type"] == "application/json"
+    assert CreateRequestToKBService.model_validate(json.loads(sent["data"])) == body
+
+
+def test_responses_are_serialized_with_orjson():
+    assert app.router.default_response_class is ORJSONResponse
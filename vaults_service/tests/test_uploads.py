@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import io
+import uuid
+from unittest import mock
+
+import pytest
+from fastapi import BackgroundTasks
+from fastapi.exceptions import HTTPException
+from pydantic import ValidationError
+
+from src.config import Settings, settings
+from src.database.models import Upload
+from src.uploads.schemas import UploadStatus
+from src.uploads.utils import complete_upload, decrypt_object, upload_part
+from src.utils.exceptions import CorruptObject
+from src.vaults.utils import abort_multipart_uploads, delete_vault, encrypt_data
+
+CHUNK_SIZE = 32
+
+
+class FakeUploadRepository:
+    def __init__(self, upload: Upload):
+        self.upload = upload
+        self.parts = {}
+
+    async def get(self, id):
+        self.upload.parts = [self.parts[number] for number in sorted(self.parts)]
+        return self.upload
+
+    async def get_part(self, upload_id, part_number):
+        return self.parts.get(part_number)
+
+    async def add_part(self, part):
+        self.parts[part.part_number] = part
+
+    async def claim_completion(self, id):
+        if self.upload.status != UploadStatus.IN_PROGRESS:
+            return False
+        self.upload.status = UploadStatus.COMPLETING
+        return True
+
+    async def set_status(self, id, status, sha256=None):
+        self.upload.status = status
+
+
+class FakeS3Repository:
+    async def upload_part(self, body, document_id, upload_id, part_number):
+        return hashlib.md5(body).hexdigest()
+
+
+@pytest.fixture
+def upload_repository():
+    upload = Upload(
+        id=uuid.uuid4(),
+        document_id=uuid.uuid4(),
+        vault_id=uuid.uuid4(),
+        filename="file.txt",
+        content_type="text/plain",
+        size=CHUNK_SIZE * 3,
+        chunk_size=CHUNK_SIZE,
+        s3_upload_id="s3-upload",
+        salt=bytes(16),
+        iv=bytes(16),
+        status=UploadStatus.IN_PROGRESS,
+        parts=[],
+    )
+    with mock.patch("src.uploads.utils.S3Repository", FakeS3Repository):
+        yield FakeUploadRepository(upload)
+
+
+async def stream(content: bytes):
+    yield content
+
+
+def send_part(repository, part_number: int, content: bytes):
+    return asyncio.run(
+        upload_part(repository.upload.id, part_number, stream(content), repository)
+    )
+
+
+def test_resending_a_part_with_other_bytes_before_later_parts_is_rejected(
+    upload_repository,
+):
+    send_part(upload_repository, 1, b"a" * CHUNK_SIZE)
+    send_part(upload_repository, 2, b"b" * CHUNK_SIZE)
+
+    # Identical re-sends are idempotent, the last part may still change
+    send_part(upload_repository, 1, b"a" * CHUNK_SIZE)
+    send_part(upload_repository, 2, b"c" * CHUNK_SIZE)
+
+    with pytest.raises(HTTPException) as error:
+        send_part(upload_repository, 1, b"x" * CHUNK_SIZE)
+    assert error.value.status_code == 409
+
+
+def test_upload_is_completed_once(upload_repository):
+    for part_number in (1, 2, 3):
+        send_part(upload_repository, part_number, b"a" * CHUNK_SIZE)
+    upload_repository.upload.status = UploadStatus.IN_PROGRESS
+    upload_repository.claim_completion = mock.AsyncMock(return_value=False)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(complete_upload(upload_repository.upload.id, upload_repository))
+    assert error.value.status_code == 409
+
+
+def test_deleting_a_vault_aborts_its_unfinished_uploads():
+    vault_repository = mock.AsyncMock()
+    vault_repository.get_vault_documents.return_value = []
+    vault_repository.delete.return_value = [(uuid.uuid4(), "s3-upload")]
+    background_tasks = BackgroundTasks()
+
+    asyncio.run(delete_vault(uuid.uuid4(), vault_repository, background_tasks))
+
+    task = background_tasks.tasks[-1]
+    assert task.func is abort_multipart_uploads
+    assert task.args == ([vault_repository.delete.return_value[0]],)
+
+
+class FakeObjectRepository:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    async def iter_chunks(self, key, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+
+def decrypt(content: bytes) -> bytes:
+    output = io.BytesIO()
+    asyncio.run(
+        decrypt_object(FakeObjectRepository(content), uuid.uuid4(), output, CHUNK_SIZE)
+    )
+    return output.getvalue()
+
+
+def test_decrypt_object_streams_the_plaintext():
+    plaintext = b"a" * (CHUNK_SIZE * 3 + 5)
+    encrypted = asyncio.run(encrypt_data(plaintext, settings.encryption_password))
+
+    assert decrypt(encrypted) == plaintext
+
+
+@pytest.mark.parametrize("length", [0, 20, 32, 40])
+def test_decrypt_object_rejects_truncated_objects(length):
+    encrypted = asyncio.run(encrypt_data(b"a" * 100, settings.encryption_password))
+
+    with pytest.raises(CorruptObject):
+        decrypt(encrypted[:length])
+
+
+@pytest.mark.parametrize("chunk_size", [0, 8 * 1024 * 1024 + 1])
+def test_upload_chunk_size_must_be_a_multiple_of_the_block_size(chunk_size):
+    with pytest.raises(ValidationError):
+        Settings(upload_chunk_size=chunk_size)